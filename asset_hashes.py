@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+
+import precompress
+
+# Content-hashed copies of the deployed data files (build.py --hashed).
+#
+# Every output gets an immutable twin named after its contents, e.g.
+# public/alevel_1.json -> public/alevel_1.3f2a9c0e1b.json, along with its .gz/.br
+# sidecars, and public/assets.json maps each logical name to its current copy:
+#
+#   {"version": 1, "assets": {"alevel_1.json": "alevel_1.3f2a9c0e1b.json", ...}}
+#
+# A shard that did not change keeps its name across deploys, so the hashed
+# files can be cached forever and only assets.json needs revalidating. The
+# client resolves names through it in src/assetManifest.js and falls back to
+# the logical names when it is missing.
+
+HASH_LENGTH = 10
+VERSION = 1
+PUBLIC_DIR = 'public'
+MANIFEST_PATH = os.path.join(PUBLIC_DIR, 'assets.json')
+HASHED_RE = re.compile(r'\.[0-9a-f]{%d}\.[A-Za-z0-9]+(\.gz|\.br)?$' % HASH_LENGTH)
+
+def content_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:HASH_LENGTH]
+
+def hashed_path(path, digest):
+    base, ext = os.path.splitext(path)
+    return f"{base}.{digest}{ext}"
+
+def is_sidecar(path):
+    return path.endswith(('.gz', '.br'))
+
+def logical_name(path, public_dir):
+    return os.path.relpath(path, public_dir).replace(os.sep, '/')
+
+def copy_if_missing(src, dst):
+    # Same name means same bytes, so an existing copy is left alone
+    if not os.path.exists(dst):
+        shutil.copyfile(src, dst)
+
+def remove_stale_copies(public_dir, keep):
+    # Hashed copies of outputs that changed or no longer exist
+    removed = 0
+    for root, _, names in os.walk(public_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            if HASHED_RE.search(name) and path not in keep:
+                os.remove(path)
+                removed += 1
+    if removed:
+        print(f"Removed {removed} stale hashed files")
+
+def publish(paths, public_dir=PUBLIC_DIR, manifest_path=MANIFEST_PATH):
+    # Writes the hashed copies of `paths` and the manifest; returns the manifest's assets
+    assets = {}
+    keep = set()
+    for path in sorted(paths):
+        if is_sidecar(path) or not os.path.exists(path):
+            continue
+        target = hashed_path(path, content_hash(path))
+        copy_if_missing(path, target)
+        keep.add(target)
+        for sidecar, target_sidecar in zip(precompress.sidecar_paths(path), precompress.sidecar_paths(target)):
+            if os.path.exists(sidecar):
+                copy_if_missing(sidecar, target_sidecar)
+                keep.add(target_sidecar)
+        assets[logical_name(path, public_dir)] = logical_name(target, public_dir)
+
+    remove_stale_copies(public_dir, keep)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': VERSION, 'assets': assets}, f, indent=2, sort_keys=True)
+    print(f"Saved {manifest_path} ({len(assets)} hashed files)")
+    return assets
@@ -0,0 +1,349 @@
+import argparse
+import ast
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import build_report
+import clean_cie
+import compress_data
+import convert_cie_csv
+import optimize_data
+import split_cie_data
+import synthetic_archive
+
+# Times and memory-profiles every pipeline stage on synthetic archives.
+#
+# For each scale a synthetic archive (see synthetic_archive.py) is generated in
+# a temporary directory and pushed through convert -> clean -> split ->
+# compress -> optimize for CIE and extract -> compress -> optimize for IAL,
+# plus the load_and_process_data functions of the two Streamlit browsers. Each
+# stage is run --repeat times for wall and CPU time (the best run counts) and
+# once more under tracemalloc for its peak Python allocation. Results are
+# written as JSON and compared stage by stage with a saved baseline:
+#
+#   python benchmark.py --scales 1 10               # run, compare with the baseline
+#   python benchmark.py --save-baseline             # run and make it the baseline
+#   python benchmark.py --check                     # exit 1 on a regression
+#
+# The baseline is per machine and not committed: run --save-baseline once
+# before the first --check, which refuses to run without one.
+#   python benchmark.py --ref HEAD~1 --stages streamlit_cie streamlit_cie@HEAD~1
+#
+# Stages whose dependencies (pandas, numpy) are missing are recorded as skipped.
+
+RESULTS_FILE = 'benchmark_results.json'
+BASELINE_FILE = 'benchmark_baseline.json'
+STREAMLIT_APPS = {
+    'streamlit_cie': 'developmentfiles/mani-cie.py',
+    'streamlit_ial': 'developmentfiles/main-ial.py',
+}
+
+def load_streamlit_function(path, name='load_and_process_data', source=None):
+    # The apps build their UI at import time, so only their functions (without
+    # the st.cache_* decorators, which would hide repeat runs) and the
+    # module's upper-case constants are compiled, skipping the CSV_DATA literal
+    if source is None:
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+    tree = ast.parse(source, filename=path)
+
+    body = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            if not any(alias.name.startswith('streamlit') for alias in node.names):
+                body.append(node)
+        elif isinstance(node, ast.Assign):
+            names = [target.id for target in node.targets if isinstance(target, ast.Name)]
+            if names and all(n.isupper() for n in names) and 'CSV_DATA' not in names:
+                body.append(node)
+        elif isinstance(node, ast.FunctionDef):
+            node.decorator_list = []
+            body.append(node)
+
+    namespace = {'__file__': os.path.abspath(path)}
+    exec(compile(ast.Module(body=body, type_ignores=[]), path, 'exec'), namespace)
+    return namespace[name]
+
+def measure(fn, repeat):
+    # Returns {'wall', 'cpu', 'peak_mb', 'runs'}, plus 'worker_peak_mb' for
+    # stages that run worker processes (tracemalloc only sees this one): the
+    # largest worker's peak RSS, when it set a new high for the benchmark.
+    # Stage output is silenced. A stage's optional fn.setup() runs first,
+    # outside the timed runs
+    setup = getattr(fn, 'setup', None)
+    if setup is not None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            setup()
+    start_workers = build_report.child_peak_rss_mb()
+
+    runs = []
+    cpu = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start_wall, start_cpu = time.perf_counter(), time.process_time()
+            fn()
+            runs.append(time.perf_counter() - start_wall)
+            cpu.append(time.process_time() - start_cpu)
+
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = {
+        'wall': round(min(runs), 4),
+        'cpu': round(min(cpu), 4),
+        'peak_mb': round(peak / 1024 / 1024, 2),
+        'runs': [round(run, 4) for run in runs],
+    }
+    workers = build_report.child_peak_rss_mb()
+    if workers is not None and workers != start_workers:
+        result['worker_peak_mb'] = workers
+    return result
+
+def peak_text(stage):
+    # "18.6", or "0.0 + 95.2 workers" for a stage that ran worker processes
+    text = f"{stage['peak_mb']:.1f}"
+    if 'worker_peak_mb' in stage:
+        text += f" + {stage['worker_peak_mb']:.1f} workers"
+    return text
+
+def pipeline_stages(archive, work):
+    # (name, fn) in dependency order; every stage reads the previous stage's
+    # files and writes its own, so each can be repeated
+    raw = os.path.join(work, 'cie_data.json')
+    cleaned = os.path.join(work, 'cie_clean.json')
+    split_dir = os.path.join(work, 'split')
+    compressed_dir = os.path.join(work, 'compressed')
+    optimized_dir = os.path.join(work, 'optimized')
+    parallel_dir = os.path.join(work, 'optimized_parallel')
+    memo_dir = os.path.join(work, 'ial_source')
+    for directory in (split_dir, compressed_dir, optimized_dir, parallel_dir):
+        os.makedirs(directory, exist_ok=True)
+
+    levels = {level: os.path.basename(path) for level, path in optimize_data.FILES.items()}
+
+    def compress_all():
+        for name in levels.values():
+            if os.path.exists(os.path.join(split_dir, name)):
+                compress_data.compress_file(os.path.join(split_dir, name),
+                                            os.path.join(compressed_dir, name))
+
+    def optimize_all():
+        for level, name in levels.items():
+            if os.path.exists(os.path.join(compressed_dir, name)):
+                optimize_data.process_file(os.path.join(compressed_dir, name), level,
+                                           os.path.join(optimized_dir, os.path.basename(optimize_data.OUTPUTS[level])))
+
+    def optimize_parallel():
+        # optimize_all with a worker per level (optimize_data.py --jobs)
+        files = {level: os.path.join(compressed_dir, name) for level, name in levels.items()}
+        outputs = {level: os.path.join(parallel_dir, os.path.basename(path)) for level, path in optimize_data.OUTPUTS.items()}
+        optimize_data.process_files_parallel(files, min(len(files), os.cpu_count() or 1), outputs=outputs)
+
+    def extract_ial():
+        # extract_data needs pandas; without it the stage is skipped. Every run
+        # parses cold: ial_source's in-process and on-disk memos are cleared and
+        # the disk memo kept in the work directory, out of the repo's .build_cache
+        import extract_data
+        import ial_source
+        ial_source._memo.clear()
+        shutil.rmtree(memo_dir, ignore_errors=True)
+        saved_dir, ial_source.MEMO_DIR = ial_source.MEMO_DIR, memo_dir
+        try:
+            extract_data.save_records(extract_data.extract_ial_data(archive['ial']),
+                                      os.path.join(split_dir, levels['IAL']))
+        finally:
+            ial_source.MEMO_DIR = saved_dir
+
+    return [
+        ('convert', lambda: convert_cie_csv.convert_cie_csv(archive['cie'], raw)),
+        ('clean', lambda: clean_cie.clean_cie(raw, cleaned)),
+        ('split', lambda: split_cie_data.split_cie_data(cleaned, split_dir)),
+        ('extract_ial', extract_ial),
+        ('compress', compress_all),
+        ('optimize', optimize_all),
+        ('optimize_parallel', optimize_parallel),
+    ]
+
+def git_source(ref, path):
+    # The file as of a git revision, for timing the code before a change
+    return subprocess.run(['git', 'show', f'{ref}:{path}'], check=True,
+                          capture_output=True, text=True, encoding='utf-8').stdout
+
+def streamlit_stages(archive, work, refs=()):
+    # streamlit_cie / streamlit_ial for the working tree, plus <name>@<ref> for
+    # each --ref so a cold load can be compared before and after a change.
+    # These start without a frame cache (frame_cache.py); <name>_cached loads
+    # from one filled before timing starts
+    shutil.copyfile(archive['cie'], os.path.join(work, 'FULL_CIE_ARCHIVE.csv'))
+    with open(archive['ial'], 'r', encoding='utf-8') as f:
+        ial_csv = f.read()
+
+    def stage(name, path, ref, disk_cache=False):
+        loaded = []
+        cache_dir = os.path.join(work, 'frame_cache', name)
+
+        def call():
+            import frame_cache
+            frame_cache.CACHE_DIR = cache_dir
+            if path == STREAMLIT_APPS['streamlit_ial']:
+                loaded[0](ial_csv)
+                return
+            # mani-cie.py reads FULL_CIE_ARCHIVE.csv from the working directory
+            cwd = os.getcwd()
+            os.chdir(work)
+            try:
+                loaded[0]()
+            finally:
+                os.chdir(cwd)
+
+        def setup():
+            # Compiles the loader and, for _cached, fills the frame cache
+            source = git_source(ref, path) if ref else None
+            loaded.append(load_streamlit_function(path, source=source))
+            if disk_cache:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+                call()
+
+        def run():
+            if not disk_cache:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+            call()
+        run.setup = setup
+        return run
+
+    stages = []
+    for name, path in STREAMLIT_APPS.items():
+        stages.append((name, stage(name, path, None)))
+        stages.append((name + '_cached', stage(name + '_cached', path, None, disk_cache=True)))
+        for ref in refs:
+            stages.append((f"{name}@{ref}", stage(f"{name}@{ref}", path, ref)))
+    return stages
+
+def run_scale(scale, repeat, only=None, refs=()):
+    work = tempfile.mkdtemp(prefix=f'moon-bench-{scale}x-')
+    try:
+        print(f"Generating {scale}x archive in {work}...")
+        archive = synthetic_archive.generate(os.path.join(work, 'archive'), scale)
+        result = {
+            'cie_rows': archive['cie_rows'],
+            'ial_rows': archive['ial_rows'],
+            'stages': {},
+        }
+        for name, fn in pipeline_stages(archive, work) + streamlit_stages(archive, work, refs):
+            if only and name not in only:
+                continue
+            try:
+                result['stages'][name] = measure(fn, repeat)
+            except ImportError as e:
+                # Missing optional dependency, e.g. pandas for extract_ial
+                result['stages'][name] = {'skipped': str(e)}
+            print(f"  {name}: {describe(result['stages'][name])}")
+        return result
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+def describe(stage):
+    if 'skipped' in stage:
+        return f"skipped ({stage['skipped']})"
+    return f"{stage['wall']:.3f}s wall, {stage['cpu']:.3f}s cpu, {peak_text(stage)} MB peak"
+
+def compare(results, baseline, tolerance):
+    # Prints the comparison table; returns the (scale, stage) pairs slower than tolerance allows
+    regressions = []
+    rows = []
+    for scale, scale_result in results['scales'].items():
+        base_scale = baseline.get('scales', {}).get(scale, {}) if baseline else {}
+        for name, stage in scale_result['stages'].items():
+            base = base_scale.get('stages', {}).get(name)
+            if 'skipped' in stage:
+                rows.append((f"{scale}x", name, '-', '-', 'skipped', '-'))
+                continue
+            if not base or 'skipped' in base:
+                rows.append((f"{scale}x", name, f"{stage['wall']:.3f}", '-', 'new', peak_text(stage)))
+                continue
+            change = stage['wall'] / base['wall'] - 1 if base['wall'] else 0
+            flag = ''
+            if change > tolerance:
+                flag = ' SLOWER'
+                regressions.append((scale, name))
+            elif change < -tolerance:
+                flag = ' faster'
+            rows.append((f"{scale}x", name, f"{stage['wall']:.3f}", f"{base['wall']:.3f}",
+                         f"{change * 100:+.1f}%{flag}", peak_text(stage)))
+
+    headers = ('Scale', 'Stage', 'Wall s', 'Baseline s', 'Change', 'Peak MB')
+    widths = [max(len(str(row[i])) for row in rows + [headers]) for i in range(len(headers))]
+    for row in [headers] + rows:
+        print('  '.join(str(cell).ljust(width) for cell, width in zip(row, widths)))
+    return regressions
+
+def load_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic archives")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10],
+                        help="Archive size multiples to run (default: 1 10; 100 takes several GB of disk)")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage (default: 3)")
+    parser.add_argument('--stages', nargs='+', help="Only run these stages (later stages need earlier ones' files)")
+    parser.add_argument('--ref', action='append', default=[],
+                        help="Also time the Streamlit loaders as of this git revision (repeatable)")
+    parser.add_argument('--output', default=RESULTS_FILE, help=f"Results file (default: {RESULTS_FILE})")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help=f"Baseline to compare with (default: {BASELINE_FILE})")
+    parser.add_argument('--save-baseline', action='store_true', help="Also save the results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="Relative slowdown reported as a regression (default: 0.10)")
+    parser.add_argument('--check', action='store_true', help="Exit with status 1 when any stage regressed")
+    args = parser.parse_args()
+
+    # Timings only compare on the machine that made them, so no baseline is
+    # committed; --check without one would pass vacuously
+    if args.check and not args.save_baseline and not os.path.exists(args.baseline):
+        sys.exit(f"--check needs a baseline, but {args.baseline} does not exist. "
+                 "Run once with --save-baseline on this machine first.")
+
+    results = {
+        'version': 1,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'scales': {},
+    }
+    for scale in args.scales:
+        results['scales'][str(scale)] = run_scale(scale, args.repeat, args.stages, args.ref)
+
+    save_json(args.output, results)
+    print(f"Saved {args.output}")
+
+    baseline = load_json(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        save_json(args.baseline, results)
+        print(f"Saved baseline {args.baseline}")
+    if args.check and regressions:
+        sys.exit(1)
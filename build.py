@@ -0,0 +1,294 @@
+import argparse
+import functools
+import hashlib
+import json
+import os
+import shutil
+
+import asset_hashes
+import build_report
+import clean_cie
+import compress_data
+import convert_cie_csv
+import ial_source
+import optimize_data
+import split_cie_data
+
+# Single entry point for regenerating public/*.json.
+#
+# The hand-run chain (extract -> convert -> clean -> split -> compress -> optimize)
+# is modelled as a small dependency graph. Every stage writes into its own
+# directory under CACHE_DIR, keyed by a hash of its source files, its code and
+# the keys of the stages it depends on, so an unchanged stage is never re-run;
+# a stage's entries for other keys are deleted once it has run, so the cache
+# holds one copy per stage. The final optimize step is keyed per level on that
+# level's source file, so untouched levels are skipped.
+# With --fused the CIE levels are built from cie.csv in a single streaming pass
+# instead, skipping the intermediate JSON files altogether.
+
+CACHE_DIR = '.build_cache'
+IAL_SOURCE = ial_source.default_source()
+CIE_SOURCE = 'developmentfiles/cie.csv'
+CIE_LEVELS = ["IGCSE", "O Level", "AS and A Level"]
+
+def run_extract_ial(out_dir, dep_dirs):
+    # pandas is only needed for this stage
+    import extract_data
+    records = extract_data.extract_ial_data(IAL_SOURCE)
+    extract_data.save_records(records, os.path.join(out_dir, 'ial_data.json'))
+    print(f"Extracted {len(records)} IAL records")
+
+def run_convert_cie(out_dir, dep_dirs):
+    convert_cie_csv.convert_cie_csv(CIE_SOURCE, os.path.join(out_dir, 'cie_data.json'))
+
+def run_clean_cie(out_dir, dep_dirs):
+    clean_cie.clean_cie(
+        os.path.join(dep_dirs['convert_cie'], 'cie_data.json'),
+        os.path.join(out_dir, 'cie_data.json')
+    )
+
+def run_split_cie(out_dir, dep_dirs):
+    split_cie_data.split_cie_data(os.path.join(dep_dirs['clean_cie'], 'cie_data.json'), out_dir)
+
+def run_compress_cie(out_dir, dep_dirs):
+    for level in CIE_LEVELS:
+        name = os.path.basename(optimize_data.FILES[level])
+        compress_data.compress_file(
+            os.path.join(dep_dirs['split_cie'], name),
+            os.path.join(out_dir, name)
+        )
+
+# IAL skips compress_data: the normalized format drops the full Pearson URLs
+# that the client links to, so it is optimized straight from the extraction.
+STAGES = {
+    'extract_ial': {'sources': [IAL_SOURCE], 'code': ['extract_data.py', 'ial_source.py'], 'deps': [], 'run': run_extract_ial},
+    'convert_cie': {'sources': [CIE_SOURCE], 'code': ['convert_cie_csv.py', 'paper_record.py'], 'deps': [], 'run': run_convert_cie},
+    'clean_cie': {'sources': [], 'code': ['clean_cie.py', 'paper_record.py'], 'deps': ['convert_cie'], 'run': run_clean_cie},
+    'split_cie': {'sources': [], 'code': ['split_cie_data.py', 'paper_record.py'], 'deps': ['clean_cie'], 'run': run_split_cie},
+    'compress_cie': {'sources': [], 'code': ['compress_data.py', 'paper_record.py'], 'deps': ['split_cie'], 'run': run_compress_cie},
+}
+
+# Level -> (stage, file inside that stage's directory) fed to optimize_data
+LEVEL_SOURCES = {
+    "IGCSE": ('compress_cie', 'cie_IGCSE.json'),
+    "O Level": ('compress_cie', 'cie_O_Level.json'),
+    "AS and A Level": ('compress_cie', 'cie_AS_and_A_Level.json'),
+    "IAL": ('extract_ial', 'ial_data.json'),
+}
+
+# Code that shapes the final shards; any change invalidates the optimize caches
+OPTIMIZE_CODE = [
+    'optimize_data.py', 'paper_record.py', 'cie_filenames.py', 'ial_urls.py', 'columnar.py', 'precompress.py',
+    'subject_shards.py', 'deltas.py', 'search_index.py', 'facet_cube.py',
+    'src/subjectMapping.js',
+]
+
+def file_hash(path):
+    h = hashlib.sha256()
+    if not os.path.exists(path):
+        h.update(b'missing')
+        return h.hexdigest()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def json_hash(value):
+    return hashlib.sha256(json.dumps(value, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+def optimize_code_key():
+    return json_hash([file_hash(p) for p in OPTIMIZE_CODE])
+
+@functools.lru_cache(maxsize=None)
+def stage_key(name):
+    stage = STAGES[name]
+    return json_hash({
+        'stage': name,
+        'build': file_hash(__file__),
+        'code': [file_hash(p) for p in stage['code']],
+        'sources': [file_hash(p) for p in stage['sources']],
+        'deps': [stage_key(dep) for dep in stage['deps']],
+    })
+
+def materialize(name, force=False, built=None):
+    # Returns the directory holding the stage's outputs, running it (and
+    # whatever it depends on) only when no cached copy exists
+    built = {} if built is None else built
+    if name in built:
+        return built[name]
+
+    key = stage_key(name)
+    out_dir = os.path.join(CACHE_DIR, name, key[:16])
+
+    if os.path.exists(os.path.join(out_dir, '.done')) and not force:
+        print(f"[{name}] cached ({key[:8]})")
+        with build_report.stage(name) as entry:
+            entry['cached'] = True
+    else:
+        stage = STAGES[name]
+        dep_dirs = {dep: materialize(dep, force, built) for dep in stage['deps']}
+        missing = [p for p in stage['sources'] if not os.path.exists(p)]
+        if missing:
+            raise FileNotFoundError(f"Stage {name} is missing sources: {missing}")
+
+        print(f"[{name}] running ({key[:8]})...")
+        tmp_dir = out_dir + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        inputs = stage['sources'] + list(dep_dirs.values())
+        with build_report.stage(name, inputs=inputs, outputs=[tmp_dir]):
+            stage['run'](tmp_dir, dep_dirs)
+        open(os.path.join(tmp_dir, '.done'), 'w').close()
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(tmp_dir, out_dir)
+
+    remove_stale_entries(os.path.dirname(out_dir), keep=out_dir)
+    built[name] = out_dir
+    return out_dir
+
+def remove_stale_entries(stage_dir, keep):
+    # Outputs of the stage's other keys (and interrupted runs); only the
+    # current key is referenced by this build or any later one with these inputs
+    for entry in os.listdir(stage_dir):
+        path = os.path.join(stage_dir, entry)
+        if path != keep:
+            shutil.rmtree(path, ignore_errors=True)
+            print(f"Removed stale cache entry {path}")
+
+def build_level(level, previous=None, force=False, built=None, extras=()):
+    # Returns the level's state entry: {'key': ..., 'outputs': [...]}
+    stage, name = LEVEL_SOURCES[level]
+    source_file = os.path.join(materialize(stage, force, built), name)
+    output_path = optimize_data.OUTPUTS[level]
+    code_key = optimize_code_key()
+    # Keyed on the level's own source file, so a change in one level's rows
+    # leaves the other levels untouched
+    level_key = json_hash([level, file_hash(source_file), code_key, output_path, sorted(extras)])
+
+    if (not force and previous and previous['key'] == level_key
+            and all(os.path.exists(p) for p in previous['outputs'])):
+        print(f"[optimize] {level} up to date")
+        with build_report.stage('optimize', level) as entry:
+            entry['cached'] = True
+        return previous
+
+    with build_report.stage('optimize.parse', level, inputs=[source_file]):
+        with open(source_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    return write_level(level, optimize_data.source_rows(data), level_key, extras)
+
+def write_level(level, rows_by_subject, level_key, extras=()):
+    # make_record is cheaper than hashing a subject's rows to look it up, so
+    # records are always rebuilt; only whole levels are skipped
+    with build_report.stage('optimize.records', level):
+        grouped = optimize_data.group_records(rows_by_subject, level)
+    outputs = optimize_data.save_level(grouped, optimize_data.OUTPUTS[level], level, extras)
+    return {'key': level_key, 'outputs': outputs}
+
+def fused_cie_rows(input_file):
+    # One pass over cie.csv producing the same {level: {subject: rows}} that
+    # convert -> clean -> split -> compress -> optimize_data.source_rows would,
+    # without writing or re-parsing any of the intermediate JSON files
+    rows = {level: {} for level in CIE_LEVELS}
+    for record in convert_cie_csv.iter_cie_rows(input_file):
+        if not clean_cie.keep_item(record):
+            continue
+        level_rows = rows.get(record.category)
+        if level_rows is None:
+            continue
+        # compress_data drops an empty subject to None, and the normalized
+        # format re-derives the component from the filename
+        record.subject = record.subject or None
+        record.component = None
+        level_rows.setdefault(record.subject, []).append(record)
+    return rows
+
+def build_cie_fused(levels, state, force=False, extras=()):
+    # Returns the updated state entries for the CIE levels in `levels`
+    code_key = optimize_code_key()
+    fused_key = json_hash([
+        'fused', file_hash(__file__), file_hash(CIE_SOURCE), code_key,
+        file_hash('convert_cie_csv.py'), file_hash('clean_cie.py'), file_hash('paper_record.py')
+    ])
+    level_keys = {
+        level: json_hash([level, fused_key, optimize_data.OUTPUTS[level], sorted(extras)])
+        for level in levels
+    }
+
+    stale = [
+        level for level in levels
+        if force or level not in state or state[level]['key'] != level_keys[level]
+        or not all(os.path.exists(p) for p in state[level]['outputs'])
+    ]
+    for level in levels:
+        if level not in stale:
+            print(f"[fused] {level} up to date")
+            with build_report.stage('optimize', level) as entry:
+                entry['cached'] = True
+    if not stale:
+        return {}
+
+    if not os.path.exists(CIE_SOURCE):
+        raise FileNotFoundError(f"Fused build is missing its source: {CIE_SOURCE}")
+    print(f"[fused] streaming {CIE_SOURCE}...")
+    with build_report.stage('fused.read', inputs=[CIE_SOURCE]):
+        rows = fused_cie_rows(CIE_SOURCE)
+    return {level: write_level(level, rows[level], level_keys[level], extras) for level in stale}
+
+def build(levels, force=False, fused=False, extras=(), hashed=False):
+    state_file = os.path.join(CACHE_DIR, 'levels.json')
+    state = {}
+    if os.path.exists(state_file):
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    # Per-subject record cache of earlier builds, no longer read
+    shutil.rmtree(os.path.join(CACHE_DIR, 'subjects'), ignore_errors=True)
+
+    built = {}
+    if fused:
+        cie_levels = [level for level in levels if level in CIE_LEVELS]
+        state.update(build_cie_fused(cie_levels, state, force, extras))
+        save_state(state)
+        levels = [level for level in levels if level not in CIE_LEVELS]
+
+    for level in levels:
+        state[level] = build_level(level, state.get(level), force, built, extras)
+        save_state(state)
+
+    if hashed:
+        # Covers every level built so far, not just the ones in this run
+        with build_report.stage('publish'):
+            asset_hashes.publish([path for entry in state.values() for path in entry['outputs']])
+
+def save_state(state):
+    # Persisted after every level so an interrupted build keeps its progress
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(os.path.join(CACHE_DIR, 'levels.json'), 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build public/*.json from the raw archives")
+    parser.add_argument('levels', nargs='*', help=f"Levels to build (default: all of {list(LEVEL_SOURCES)})")
+    parser.add_argument('--force', action='store_true', help="Ignore cached stages and levels")
+    parser.add_argument('--fused', action='store_true',
+                        help="Go from cie.csv straight to the CIE shards in one pass, skipping the intermediate stages")
+    parser.add_argument('--emit', action='append',
+                        choices=list(optimize_data.EXTRA_OUTPUTS) + list(optimize_data.POST_OUTPUTS), default=[],
+                        help="Extra output to write next to each level (repeatable)")
+    parser.add_argument('--hashed', action='store_true',
+                        help="Also write content-hashed copies of the outputs and public/assets.json")
+    parser.add_argument('--clean', action='store_true', help="Delete the build cache before building")
+    parser.add_argument('--report', default=build_report.REPORT_FILE,
+                        help=f"Where to write the per-stage timings (default: {build_report.REPORT_FILE})")
+    args = parser.parse_args()
+
+    unknown = [level for level in args.levels if level not in LEVEL_SOURCES]
+    if unknown:
+        parser.error(f"Unknown levels: {unknown}")
+
+    if args.clean:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        print(f"Deleted {CACHE_DIR}")
+
+    build(args.levels or list(LEVEL_SOURCES), args.force, args.fused, args.emit, args.hashed)
+    build_report.finish(args.report)
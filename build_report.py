@@ -0,0 +1,207 @@
+import contextlib
+import json
+import os
+import platform
+import re
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    # Windows has no getrusage; peak RSS is reported as null there
+    resource = None
+
+# Per-stage timing and memory instrumentation for the pipeline scripts.
+#
+#   with build_report.stage('clean', inputs=[src], outputs=[dst]):
+#       ...
+#   build_report.finish()          # writes build_report.json, prints the table
+#
+# Each stage records wall and CPU time, its memory and the bytes of its input
+# and output files (directories are summed). Stages can nest, e.g.
+# optimize.parse inside a level's build, and are kept in start order with
+# their depth.
+#
+# Memory is per stage, not the process's lifetime high-water mark: on Linux
+# the kernel's peak RSS (VmHWM) is reset when a stage starts (clear_refs), so
+#   peak_rss_mb   is the highest RSS while the stage ran, nested stages included
+#   rss_delta_mb  is how far that peak rose above the RSS the stage started at
+# Where the peak cannot be reset (macOS, Windows) both are null. Worker
+# processes (optimize_data.py --jobs) have their own RSS, so
+#   child_peak_rss_mb  is the largest worker's peak, when the stage's workers
+# set a new high for the run (getrusage's RUSAGE_CHILDREN only keeps the max).
+# A stage costs two clock reads, a couple of small /proc reads, one getrusage
+# call and a stat per file, so the instrumentation stays on in every build.
+
+REPORT_FILE = 'build_report.json'
+VERSION = 2
+
+STARTED = time.time()
+START_WALL = time.perf_counter()
+STAGES = []
+_depth = 0
+# Running peak RSS (KB) of each open stage, innermost last; a nested stage
+# resets the kernel's counter, so it hands its peak up when it ends
+_peaks = []
+
+STATUS_FILE = '/proc/self/status'
+CLEAR_REFS_FILE = '/proc/self/clear_refs'
+
+def rusage_mb(who):
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def peak_rss_mb():
+    # The process's peak for the run's total; resetting VmHWM resets ru_maxrss
+    # too, so the stages' own peaks are folded in
+    peaks = [entry['peak_rss_mb'] for entry in STAGES if entry.get('peak_rss_mb') is not None]
+    if resource is not None:
+        peaks.append(rusage_mb(resource.RUSAGE_SELF))
+    return max(peaks) if peaks else None
+
+def child_peak_rss_mb():
+    return rusage_mb(resource.RUSAGE_CHILDREN) if resource is not None else None
+
+def status_kb():
+    # (current RSS, peak RSS since the last reset) in KB, or None off Linux
+    try:
+        with open(STATUS_FILE, 'r') as f:
+            status = f.read()
+    except OSError:
+        return None
+    rss = re.search(r'^VmRSS:\s+(\d+)', status, re.MULTILINE)
+    hwm = re.search(r'^VmHWM:\s+(\d+)', status, re.MULTILINE)
+    return (int(rss.group(1)), int(hwm.group(1))) if rss and hwm else None
+
+def reset_peak():
+    # Sets VmHWM back to the current RSS; False where the kernel does not allow it
+    try:
+        with open(CLEAR_REFS_FILE, 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def enter_memory():
+    # Returns the RSS (KB) the stage starts at, or None when it cannot be measured
+    status = status_kb()
+    if status is None:
+        return None
+    if _peaks and _peaks[-1] is not None:
+        _peaks[-1] = max(_peaks[-1], status[1])
+    if not reset_peak():
+        _peaks.append(None)
+        return None
+    _peaks.append(status[0])
+    return status[0]
+
+def exit_memory():
+    # Returns the stage's peak RSS (KB) and hands it to the enclosing stage
+    peak = _peaks.pop()
+    status = status_kb()
+    if peak is None or status is None:
+        return None
+    peak = max(peak, status[1])
+    if _peaks and _peaks[-1] is not None:
+        _peaks[-1] = max(_peaks[-1], peak)
+    return peak
+
+def path_bytes(paths):
+    total = 0
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        elif os.path.exists(path):
+            total += os.path.getsize(path)
+    return total
+
+@contextlib.contextmanager
+def stage(name, level=None, inputs=(), outputs=()):
+    # Yields the entry; callers may extend entry['outputs'] or set extra keys
+    # (e.g. 'cached') before the block ends. Inputs are measured up front, as
+    # some scripts overwrite their input in place
+    global _depth
+    entry = {'name': name, 'level': level, 'depth': _depth, 'bytes_in': path_bytes(inputs), 'outputs': list(outputs)}
+    STAGES.append(entry)
+    _depth += 1
+    start_rss = enter_memory()
+    start_children = child_peak_rss_mb()
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    try:
+        yield entry
+    except BaseException as e:
+        entry['error'] = type(e).__name__
+        raise
+    finally:
+        _depth -= 1
+        entry['wall'] = round(time.perf_counter() - start_wall, 4)
+        entry['cpu'] = round(time.process_time() - start_cpu, 4)
+        peak = exit_memory()
+        entry['peak_rss_mb'] = round(peak / 1024, 1) if peak is not None else None
+        entry['rss_delta_mb'] = round((peak - start_rss) / 1024, 1) if peak is not None else None
+        children = child_peak_rss_mb()
+        entry['child_peak_rss_mb'] = children if children is not None and children != start_children else None
+        entry['bytes_out'] = path_bytes(entry.pop('outputs'))
+
+def report():
+    return {
+        'version': VERSION,
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(STARTED)),
+        'command': ' '.join(sys.argv),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'total': {
+            'wall': round(time.perf_counter() - START_WALL, 4),
+            'cpu': round(time.process_time(), 4),
+            'peak_rss_mb': peak_rss_mb(),
+        },
+        # Stages still open (finish() called inside one) have no timings yet
+        'stages': [entry for entry in STAGES if 'wall' in entry],
+    }
+
+def format_bytes(n):
+    for unit in ('B', 'KB', 'MB'):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+def optional(value):
+    return value if value is not None else '-'
+
+def print_summary(data):
+    headers = ('Stage', 'Level', 'Wall s', 'CPU s', 'Peak RSS MB', '+RSS MB', 'Worker MB', 'In', 'Out')
+    rows = []
+    for entry in data['stages']:
+        name = '  ' * entry['depth'] + entry['name']
+        if entry.get('cached'):
+            name += ' (cached)'
+        if entry.get('error'):
+            name += f" ({entry['error']})"
+        rows.append((name, entry['level'] or '', f"{entry['wall']:.3f}", f"{entry['cpu']:.3f}",
+                     optional(entry.get('peak_rss_mb')), optional(entry.get('rss_delta_mb')),
+                     optional(entry.get('child_peak_rss_mb')),
+                     format_bytes(entry['bytes_in']), format_bytes(entry['bytes_out'])))
+    total = data['total']
+    rows.append(('total', '', f"{total['wall']:.3f}", f"{total['cpu']:.3f}",
+                 optional(total['peak_rss_mb']), '', '', '', ''))
+
+    widths = [max(len(str(row[i])) for row in rows + [headers]) for i in range(len(headers))]
+    for row in [headers] + rows:
+        print('  '.join(str(cell).ljust(width) for cell, width in zip(row, widths)).rstrip())
+
+def finish(path=REPORT_FILE):
+    # Writes the report (unless path is None) and prints the summary table
+    data = report()
+    if path:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+    print_summary(data)
+    if path:
+        print(f"Saved {path}")
+    return data
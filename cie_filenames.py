@@ -0,0 +1,226 @@
+import re
+
+# Most CIE filenames are fully determined by the record itself:
+#
+#   <code>_<m|s|w><yy>_<type>[_<comp>].pdf      e.g. 9706_m16_ms_12.pdf
+#
+# with the 4-digit code taken from the subject name ("Accounting (9706)"). The
+# optimizer drops the filename from every record that matches this template
+# (leaving [y, s, t, c]) and only keeps it for genuine exceptions
+# ([y, s, t, c, filename]). cie_filename is the reference reconstructor; the
+# client mirrors it in src/cieFilenames.js, so the two must stay in step.
+#
+# parse_filename goes the other way, reading code, session, year, type, paper
+# and variant out of a filename in one match of FILENAME_RE; parse_series does
+# the same for a whole pandas Series (the Streamlit browsers). component and
+# component_series give a row's paper/variant number the same two ways, and
+# document_type and document_type_series label its document type.
+
+SESSION_LETTERS = {3: 'm', 6: 's', 11: 'w'}
+# Letter -> month; 'y' (specimen / syllabus year ranges) has no session
+LETTER_SESSIONS = {'j': 1, 'm': 3, 's': 6, 'w': 11}
+SUBJECT_CODE_RE = re.compile(r'\((\d{4})\)$')
+FILENAME_RE = re.compile(
+    r'^(?P<code>\d{4})_(?P<session>[a-z])(?P<year>\d{2})_(?P<type>[a-z]+)'
+    r'(?:_(?P<paper>\d)(?P<variant>\d)?)?\.pdf$',
+    re.IGNORECASE
+)
+FIELDS = ['code', 'session', 'year', 'type', 'paper', 'variant']
+# The same grammar capturing only the type: a one-group str.extract is several
+# times faster than the full parse over a whole column
+FILENAME_TYPE_RE = re.compile(re.sub(r'\(\?P<(?!type>)\w+>', '(?:', FILENAME_RE.pattern), re.IGNORECASE)
+# Irregular names ("0470_s16_in_A_21.pdf", "9699_s09_i2_31.pdf")
+LOOSE_COMPONENT_RE = re.compile(r'_(\d{2})\.pdf$')
+INNER_COMPONENT_RE = re.compile(r'_(\d{2})_')
+
+def subject_code(subject):
+    match = SUBJECT_CODE_RE.search(subject or '')
+    return match.group(1) if match else None
+
+def full_year(yy):
+    return 2000 + yy if yy < 50 else 1900 + yy
+
+def parse_filename(filename):
+    # "9709_s19_qp_32.pdf" -> {'code': '9709', 'session': 6, 'year': 2019, 'type': 'qp',
+    # 'paper': 3, 'variant': 2}; None when the name is not in the template grammar
+    match = FILENAME_RE.match(filename or '')
+    if not match:
+        return None
+    code, letter, yy, type_, paper, variant = match.groups()
+    return {
+        'code': code,
+        'session': LETTER_SESSIONS.get(letter.lower()),
+        'year': full_year(int(yy)),
+        'type': type_.lower(),
+        'paper': int(paper) if paper else None,
+        'variant': int(variant) if variant else None,
+    }
+
+def parse_series(filenames):
+    # Vectorized parse_filename: a DataFrame with FIELDS as columns (nullable
+    # Int64 for the numbers), missing values where a name does not match
+    import pandas as pd
+
+    parsed = filenames.astype(str).str.extract(FILENAME_RE)
+    parsed['session'] = parsed['session'].str.lower().map(LETTER_SESSIONS).astype('Int64')
+    yy = pd.to_numeric(parsed['year']).astype('Int64')
+    parsed['year'] = yy + 1900 + 100 * (yy < 50)
+    parsed['type'] = parsed['type'].str.lower()
+    for name in ('paper', 'variant'):
+        parsed[name] = pd.to_numeric(parsed[name]).astype('Int64')
+    return parsed[FIELDS]
+
+def filename_component(filename):
+    # The two-digit component of a filename ("12" in 9706_m16_ms_12.pdf), or None;
+    # single-digit papers are left to the source's own component. Names outside
+    # the grammar fall back to a trailing or embedded _NN_
+    match = FILENAME_RE.match(filename or '')
+    if match:
+        paper, variant = match.group('paper', 'variant')
+        return paper + variant if variant else None
+    match = LOOSE_COMPONENT_RE.search(filename or '') or INNER_COMPONENT_RE.search(filename or '')
+    return match.group(1) if match else None
+
+def component(extracted_component, filename):
+    # A row's component as an int (32 = paper 3 variant 2, 0 = none): the
+    # source's Extracted_Component, or for rows without one the paper and
+    # variant the filename spells out ("9709_s19_ms_32.pdf" -> 32, "_3.pdf" -> 3).
+    # Before the filename fallback those rows were all shown as "-"
+    try:
+        comp = int(float(extracted_component))
+    except (TypeError, ValueError, OverflowError):
+        comp = 0
+    if comp:
+        return comp
+    parsed = parse_filename(str(filename))
+    if parsed is None or parsed['paper'] is None:
+        return 0
+    if parsed['variant'] is None:
+        return parsed['paper']
+    return parsed['paper'] * 10 + parsed['variant']
+
+def component_series(extracted_components, filenames):
+    # Vectorized component: an int Series. Only the rows without an
+    # Extracted_Component have their filenames parsed
+    import pandas as pd
+
+    comp = pd.to_numeric(extracted_components, errors='coerce').fillna(0).astype(int)
+    missing = comp == 0
+    parsed = parse_series(filenames[missing])
+    from_name = (parsed['paper'] * 10 + parsed['variant']).fillna(parsed['paper']).fillna(0)
+    comp[missing] = from_name.astype(int)
+    return comp
+
+# Document types the browsers label, in precedence order: (label, codes)
+DOCUMENT_TYPES = [
+    ('Question Paper', ('qp',)),
+    ('Mark Scheme', ('ms',)),
+    ('Examiner Report', ('er',)),
+    ('Grade Thresholds', ('gt',)),
+    ('Specimen Paper', ('sp',)),
+    ('Syllabus', ('sy',)),
+    ('Instructions', ('ir', 'ci')),
+]
+# Extracted_Type names a label or holds a code as a word ("Question Paper", "qp");
+# "er" inside "Paper" or "Other" is not a match
+EXTRACTED_TYPE_RES = [
+    re.compile(r'^%s$|\b(?:%s)\b' % (re.escape(label.lower()), '|'.join(codes)))
+    for label, codes in DOCUMENT_TYPES
+]
+# A code as a token of its own in a filename ("_ms_", "_ms.pdf"), not inside a word
+LOOSE_TYPE_RES = [
+    re.compile(r'(?<![a-z])(?:%s)(?![a-z])' % '|'.join(codes))
+    for _, codes in DOCUMENT_TYPES
+]
+
+def document_type(extracted_type, filename):
+    # The first DOCUMENT_TYPES label matched by the source's Extracted_Type or
+    # by the filename, else 'Other'. The filename's type is the grammar's when
+    # it parses ("9709_s19_gt.pdf"); irregular names ("9696_s03_qp_2+3.pdf")
+    # fall back to a code standing alone in the name
+    extracted_type = str(extracted_type).lower()
+    name = str(filename).lower()
+    parsed = parse_filename(name)
+    for (label, codes), extracted_re, loose_re in zip(DOCUMENT_TYPES, EXTRACTED_TYPE_RES, LOOSE_TYPE_RES):
+        if extracted_re.search(extracted_type):
+            return label
+        if parsed is not None:
+            if parsed['type'] in codes:
+                return label
+        elif loose_re.search(name):
+            return label
+    return 'Other'
+
+def document_type_series(extracted_types, filenames):
+    # Vectorized document_type: an array of labels. Extracted_Type has a handful
+    # of distinct values, so its tests run on the categories only, and the loose
+    # filename tests only on the names outside the grammar
+    import numpy as np
+
+    extracted = extracted_types.astype(str).str.lower().astype('category')
+    names = filenames.astype(str).str.lower()
+    parsed = names.str.extract(FILENAME_TYPE_RE, expand=False)
+    unparsed = parsed.isna().to_numpy()
+    loose_names = names[unparsed]
+
+    conditions = []
+    for (label, codes), extracted_re, loose_re in zip(DOCUMENT_TYPES, EXTRACTED_TYPE_RES, LOOSE_TYPE_RES):
+        loose = np.zeros(len(names), dtype=bool)
+        loose[unparsed] = loose_names.str.contains(loose_re, na=False).to_numpy(bool)
+        conditions.append(
+            extracted.str.contains(extracted_re, na=False).to_numpy(bool) |
+            parsed.isin(codes).to_numpy(bool) |
+            loose
+        )
+    return np.select(conditions, [label for label, _ in DOCUMENT_TYPES], 'Other')
+
+def component_text(c):
+    # Matches JavaScript's String(c) for the values the records hold
+    if c is None:
+        return None
+    if isinstance(c, float):
+        return str(int(c)) if c.is_integer() else None
+    return str(c)
+
+def cie_filename(code, y, s, t, c):
+    # Returns the canonical filename for the record, or None if it has no template form
+    letter = SESSION_LETTERS.get(s)
+    if not code or not letter or not t or not 0 <= y < 100:
+        return None
+    name = f"{code}_{letter}{y:02d}_{t}"
+    if c is not None:
+        comp = component_text(c)
+        if comp is None:
+            return None
+        name += f"_{comp}"
+    return name + ".pdf"
+
+def compact_records(subject, records):
+    # Drops the filename from records that the template reproduces exactly
+    code = subject_code(subject)
+    compact = []
+    for record in records:
+        y, s, t, c, u = record
+        if u and cie_filename(code, y, s, t, c) == u:
+            compact.append([y, s, t, c])
+        else:
+            compact.append(record)
+    return compact
+
+def expand_records(subject, records):
+    code = subject_code(subject)
+    return [
+        record if len(record) > 4 else record + [cie_filename(code, *record)]
+        for record in records
+    ]
+
+def compact_grouped(grouped, level_name):
+    # IAL keeps full Pearson URLs, which follow no template
+    if level_name == 'IAL':
+        return grouped
+    return {subject: compact_records(subject, records) for subject, records in grouped.items()}
+
+def expand_grouped(grouped, level_name):
+    if level_name == 'IAL':
+        return grouped
+    return {subject: expand_records(subject, records) for subject, records in grouped.items()}
@@ -1,11 +1,5 @@
-import json
-
-input_file = 'public/cie_data.json'
-
-with open(input_file, 'r') as f:
-    data = json.load(f)
-
-initial_count = len(data)
+import build_report
+import paper_record
 
 # Filter out items with Year="Unknown" AND Session=""
 # The user said: "There shouldn't be a single thing that has this: "Year": "Unknown", "Session": "","
@@ -13,15 +7,26 @@ initial_count = len(data)
 # "There shouldn't be a single thing that has this: ... " usually implies the specific combination.
 # However, looking at previous context, "Unknown" years caused issues.
 # Let's look at the data first to see what "Session": "" looks like.
+def keep_item(record):
+    return not (record.year is None and record.session_name == '')
+
+def clean_cie(input_file='public/cie_data.json', output_file=None):
+    output_file = output_file or input_file
+
+    data = paper_record.load_records(input_file)
+
+    initial_count = len(data)
+
+    cleaned_data = [item for item in data if keep_item(item)]
 
-cleaned_data = [
-    item for item in data 
-    if not (item.get('Year') == 'Unknown' and item.get('Session') == '')
-]
+    removed_count = initial_count - len(cleaned_data)
 
-removed_count = initial_count - len(cleaned_data)
+    with open(output_file, 'w') as f:
+        paper_record.write_records(cleaned_data, f, indent=2)
 
-with open(input_file, 'w') as f:
-    json.dump(cleaned_data, f, indent=2)
+    print(f"Removed {removed_count} items from {input_file}")
 
-print(f"Removed {removed_count} items from {input_file}")
+if __name__ == "__main__":
+    with build_report.stage('clean_cie', inputs=['public/cie_data.json'], outputs=['public/cie_data.json']):
+        clean_cie()
+    build_report.finish()
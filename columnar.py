@@ -0,0 +1,181 @@
+import json
+import os
+import struct
+import sys
+from array import array
+
+import cie_filenames
+
+# Binary columnar layout for a level's {subject: [[y, s, t, c, u], ...]} records.
+#
+#   0   4 bytes  magic b'MPC1'
+#   4   uint32   header length in bytes
+#   8   header   UTF-8 JSON, padded with spaces to a multiple of 8
+#   ..  columns  little-endian typed arrays, each starting on an 8-byte boundary
+#
+# The header lists the small dictionaries (types, components) and, for every
+# column, its absolute byte offset and element type, so a browser can wrap each
+# one in a TypedArray over a single ArrayBuffer without any JSON parsing of the
+# records. Subjects and filenames/URLs share one string table: a lengths column
+# plus a block of UTF-8 bytes holding every subject name followed by one URL per
+# record, so record i's URL is string subjectCount + i. The url_kind column says
+# whether that string is stored, derived from the CIE filename template (see
+# cie_filenames.py; the string is then empty) or missing.
+
+MAGIC = b'MPC1'
+VERSION = 1
+ALIGN = 8
+
+# array typecode per element type; 'I' is 4 bytes on every platform we build on
+TYPECODES = {'u8': 'B', 'u16': 'H', 'u32': 'I'}
+
+def int_type(max_value):
+    if max_value < 1 << 8:
+        return 'u8'
+    if max_value < 1 << 16:
+        return 'u16'
+    return 'u32'
+
+# url_kind values
+URL_STORED = 0
+URL_DERIVED = 1
+URL_NULL = 2
+
+def encode_level(grouped, level_name):
+    # String table: every subject name, then one URL per record in record order
+    # (empty for derived or missing ones), so record i's URL is string
+    # subjectCount + i and needs no id column
+    grouped = cie_filenames.compact_grouped(grouped, level_name)
+    subjects = list(grouped)
+    urls = []
+
+    # Dictionaries keyed on the JSON form so 12.0 and '12' stay distinct
+    types, type_ids = [], {}
+    components, component_ids = [None], {'null': 0}
+
+    columns = {'subject': [], 'year': [], 'session': [], 'type': [], 'component': [], 'url_kind': []}
+    for subj_id, subject in enumerate(subjects):
+        for record in grouped[subject]:
+            y, s, t, c = record[:4]
+            u = record[4] if len(record) > 4 else ''
+
+            if t not in type_ids:
+                type_ids[t] = len(types)
+                types.append(t)
+            c_key = json.dumps(c)
+            if c_key not in component_ids:
+                component_ids[c_key] = len(components)
+                components.append(c)
+
+            columns['subject'].append(subj_id)
+            columns['year'].append(y)
+            columns['session'].append(s)
+            columns['type'].append(type_ids[t])
+            columns['component'].append(component_ids[c_key])
+            if len(record) == 4:
+                columns['url_kind'].append(URL_DERIVED)
+            else:
+                columns['url_kind'].append(URL_NULL if u is None else URL_STORED)
+            urls.append(u or '')
+
+    # Lengths rather than offsets: they fit in a byte and compress far better
+    encoded = [value.encode('utf-8') for value in subjects + urls]
+    columns['string_lengths'] = [len(raw) for raw in encoded]
+
+    blocks = {}
+    for name, values in columns.items():
+        kind = int_type(max(values, default=0))
+        data = array(TYPECODES[kind], values)
+        if data.itemsize != int(kind[1:]) // 8:
+            raise RuntimeError(f"array typecode {data.typecode} is not {kind} on this platform")
+        if sys.byteorder == 'big':
+            data.byteswap()
+        blocks[name] = (kind, len(values), data.tobytes())
+    blocks['strings'] = ('bytes', len(encoded), b''.join(encoded))
+
+    # Offsets depend on the header length and the header holds the offsets, so
+    # lay out the columns relative to the header first and then fix them up
+    header = {
+        'version': VERSION,
+        'level': level_name,
+        'count': len(columns['year']),
+        'subjectCount': len(subjects),
+        'types': types,
+        'components': components,
+        'columns': {},
+    }
+    header_size = 0
+    while True:
+        offset = align(8 + header_size)
+        for name, (kind, count, data) in blocks.items():
+            header['columns'][name] = {'offset': offset, 'type': kind, 'count': count, 'bytes': len(data)}
+            offset = align(offset + len(data))
+        header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        padded = align(len(header_bytes))
+        if padded == header_size:
+            break
+        header_size = padded
+
+    out = bytearray(MAGIC + struct.pack('<I', header_size))
+    out += header_bytes.ljust(header_size, b' ')
+    for name, (kind, count, data) in blocks.items():
+        out += b'\0' * (header['columns'][name]['offset'] - len(out))
+        out += data
+    return bytes(out)
+
+def align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+def read_header(data):
+    if data[:4] != MAGIC:
+        raise ValueError("Not a columnar shard")
+    header_size = struct.unpack_from('<I', data, 4)[0]
+    return json.loads(data[8:8 + header_size].decode('utf-8'))
+
+def read_column(data, column):
+    if column['type'] == 'bytes':
+        return data[column['offset']:column['offset'] + column['bytes']]
+    values = array(TYPECODES[column['type']])
+    values.frombytes(data[column['offset']:column['offset'] + column['bytes']])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+def decode_level(data):
+    # Reference decoder: returns the same {subject: [[y, s, t, c, u], ...]} that was encoded
+    header = read_header(data)
+    cols = {name: read_column(data, col) for name, col in header['columns'].items()}
+
+    raw = cols['strings']
+    strings = []
+    offset = 0
+    for length in cols['string_lengths']:
+        strings.append(raw[offset:offset + length].decode('utf-8'))
+        offset += length
+
+    subject_count = header['subjectCount']
+    grouped = {}
+    for i in range(header['count']):
+        subject = strings[cols['subject'][i]]
+        record = [
+            cols['year'][i],
+            cols['session'][i],
+            header['types'][cols['type'][i]],
+            header['components'][cols['component'][i]],
+        ]
+        if cols['url_kind'][i] == URL_STORED:
+            record.append(strings[subject_count + i])
+        elif cols['url_kind'][i] == URL_NULL:
+            record.append(None)
+        grouped.setdefault(subject, []).append(record)
+    return cie_filenames.expand_grouped(grouped, header['level'])
+
+def save_binary(grouped, filepath, level_name):
+    # Writes <base>.bin next to the JSON output and returns the paths written
+    base, _ = os.path.splitext(filepath)
+    bin_path = base + '.bin'
+    data = encode_level(grouped, level_name)
+    with open(bin_path, 'wb') as f:
+        f.write(data)
+    print(f"Saved columnar {bin_path} ({len(data) / 1024:.0f} KB)")
+    return [bin_path]
@@ -1,6 +1,9 @@
 import json
 import os
 
+import build_report
+import paper_record
+
 # Configuration
 files_to_process = [
     "public/cie_IGCSE.json",
@@ -12,7 +15,9 @@ files_to_process = [
 COMMON_URL_PREFIX = "https://papers.xtremepape.rs/CAIE/"
 IAL_URL_PREFIX = "https://qualifications.pearson.com/content/dam/pdf/International Advanced Level/"
 
-def compress_file(filepath):
+def compress_file(filepath, output_path=None):
+    output_path = output_path or filepath
+
     if not os.path.exists(filepath):
         print(f"File not found: {filepath}")
         return
@@ -20,8 +25,7 @@ def compress_file(filepath):
     print(f"Compressing {filepath}...")
     
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = paper_record.load_records(filepath)
         
         # Dictionaries for deduplication
         subjects = []
@@ -35,25 +39,20 @@ def compress_file(filepath):
         
         compressed_rows = []
         
-        is_ial = "ial" in filepath
+        is_ial = "ial" in os.path.basename(filepath)
         url_prefix = IAL_URL_PREFIX if is_ial else COMMON_URL_PREFIX
         
-        for item in data:
-            # Handle mapped keys from previous optimization or original keys
-            # We support both for robustness
-            
-            # Extract values
-            subj = item.get('S') or item.get('Subject') or item.get('Unit_Code') # IAL uses Unit_Code as subject-like grouper sometimes, but let's stick to Subject if available
-            if is_ial:
-                 subj = item.get('uc') or item.get('Unit_Code') # For IAL we group by Unit Code in the UI often
-            
-            year = item.get('y') or item.get('Year')
-            sess = item.get('s') or item.get('Session')
-            typ = item.get('t') or item.get('Type')
-            url = item.get('u') or item.get('URL')
-            unit = item.get('U') or item.get('Unit')
-            component = item.get('C') or item.get('Component')
-            title = item.get('T') or item.get('Title') # IAL specific
+        for record in data:
+            # paper_record maps every item layout (CIE Subject, IAL Unit_Code,
+            # older short keys) onto the same fields
+            subj = record.subject or None
+            year = record.year
+            sess = record.session_name
+            typ = record.type_name
+            url = record.url
+            unit = record.unit
+            component = record.component
+            title = record.title
             
             # 1. Subject Index
             if subj not in subject_map:
@@ -95,10 +94,10 @@ def compress_file(filepath):
         }
             
         # Write back
-        with open(filepath, 'w', encoding='utf-8') as f:
+        with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(output, f, separators=(',', ':'))
             
-        print(f"Compressed {filepath}")
+        print(f"Compressed {output_path}")
         
     except Exception as e:
         print(f"Error processing {filepath}: {e}")
@@ -107,4 +106,6 @@ def compress_file(filepath):
 
 if __name__ == "__main__":
     for file in files_to_process:
-        compress_file(file)
+        with build_report.stage('compress', os.path.basename(file), inputs=[file], outputs=[file]):
+            compress_file(file)
+    build_report.finish()
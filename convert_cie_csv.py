@@ -1,7 +1,9 @@
 import csv
-import json
 import re
 
+import build_report
+import paper_record
+
 def clean_category(cat):
     return cat.strip('[]')
 
@@ -18,53 +20,61 @@ def map_type(extracted_type):
     # Default to 'other' if not found or if extracted_type is empty
     return type_map.get(extracted_type, 'other')
 
-data = []
-with open('developmentfiles/cie.csv', 'r') as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        category = clean_category(row['Category'])
-        subject = row['Subject'].strip('[]')
-        
-        # Use Extracted_Year if available, else Year
-        year = row['Extracted_Year'] if row['Extracted_Year'] else row['Year']
-        try:
-            year = int(year)
-        except:
-            year = 'Unknown'
-            
-        session = row['Extracted_Session']
+def convert_row(row):
+    category = clean_category(row['Category'])
+    subject = row['Subject'].strip('[]')
+    
+    # Use Extracted_Year if available, else Year
+    year = row['Extracted_Year'] if row['Extracted_Year'] else row['Year']
+    try:
+        year = int(year)
+    except:
+        year = 'Unknown'
         
-        # Map type
-        # The CSV has 'Extracted_Type' which seems to be verbose like 'Examiner Report'
-        # I need to check what values are in Extracted_Type
-        type_ = map_type(row['Extracted_Type'])
+    session = row['Extracted_Session']
+    
+    # Map type
+    # The CSV has 'Extracted_Type' which seems to be verbose like 'Examiner Report'
+    # I need to check what values are in Extracted_Type
+    type_ = map_type(row['Extracted_Type'])
+    
+    component = row['Extracted_Component']
+    if not component:
+        component = None
         
-        component = row['Extracted_Component']
-        if not component:
-            component = None
-            
-        # Unit seems to be the subject code number
-        unit = row['Extracted_UnitCode']
-        try:
-            unit = float(unit)
-        except:
-            unit = None
+    # Unit seems to be the subject code number
+    unit = row['Extracted_UnitCode']
+    try:
+        unit = float(unit)
+    except:
+        unit = None
+
+    return paper_record.PaperRecord(subject, year, session, type_, component, row['Full_URL'], category, unit)
+
+def iter_cie_rows(input_file):
+    # Yields converted records one at a time so the archive is never held in memory
+    with open(input_file, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            yield convert_row(row)
+
+def count_records(items, counts):
+    # Passes records through while tallying them per category
+    for record in items:
+        counts[record.category] = counts.get(record.category, 0) + 1
+        yield record
 
-        item = {
-            "Category": category,
-            "Subject": subject,
-            "Year": year,
-            "Session": session,
-            "Type": type_,
-            "Component": component,
-            "URL": row['Full_URL'],
-            "Unit": unit
-        }
-        data.append(item)
+def convert_cie_csv(input_file='developmentfiles/cie.csv', output_file='public/cie_data.json'):
+    counts = {}
+    with open(output_file, 'w') as f:
+        paper_record.write_records(count_records(iter_cie_rows(input_file), counts), f)
 
-with open('public/cie_data.json', 'w') as f:
-    json.dump(data, f, indent=2)
+    print(f"Converted {sum(counts.values())} items.")
+    print(f"Categories found: {set(counts)}")
+    for category, count in sorted(counts.items()):
+        print(f"  {category}: {count}")
+    return counts
 
-print(f"Converted {len(data)} items.")
-categories = set(d['Category'] for d in data)
-print(f"Categories found: {categories}")
+if __name__ == "__main__":
+    with build_report.stage('convert_cie', inputs=['developmentfiles/cie.csv'], outputs=['public/cie_data.json']):
+        convert_cie_csv()
+    build_report.finish()
@@ -0,0 +1,141 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+
+import cie_filenames
+import precompress
+
+# Delta patches between dataset releases (optimize_data.py --emit deltas).
+#
+# Every record gets an id from its subject and its full contents (filename or
+# URL included), so an unchanged paper keeps its id across builds and a paper
+# whose type, year, session or component was corrected gets a new one: the
+# patch removes the old record and adds the new. A release is the set of a
+# level's record ids, and its version is a hash of that set. The last KEEP_VERSIONS releases
+# are kept in developmentfiles/releases/<level>/ (commit them, so the next
+# build can diff against them), and for each of them this writes
+#
+#   public/deltas/<level>/<from>.json
+#     {"from": ..., "to": ..., "added": {subject: [records]}, "removed": [ids]}
+#
+# with records compacted as in the level files (CIE filenames dropped where the
+# template rebuilds them; IAL keeps full URLs). public/deltas/<level>/index.json
+# gives the current version and the versions a patch exists for, so a client
+# that kept an older copy can fetch a few KB instead of the whole level.
+
+KEEP_VERSIONS = 5
+RELEASES_DIR = 'developmentfiles/releases'
+DELTAS_DIR = 'public/deltas'
+
+# Releases and patches are kept per level, not per output file, so standalone
+# runs (public/cie_IGCSE.json) and build.py (public/igcse.json) share one
+# history; keys are the deployed names in optimize_data.OUTPUTS
+LEVEL_KEYS = {'IGCSE': 'igcse', 'O Level': 'olevel', 'AS and A Level': 'alevel', 'IAL': 'ial'}
+
+def level_key(level_name):
+    return LEVEL_KEYS.get(level_name) or re.sub(r'[^a-z0-9]+', '_', level_name.lower())
+
+def record_id(subject, record):
+    return f"{subject}\t{json.dumps(record, separators=(',', ':'))}"
+
+def record_ids(grouped):
+    # Returns [(id, subject, record)]; repeats of an id within a release get #2, #3, ...
+    seen = {}
+    out = []
+    for subject, records in grouped.items():
+        for record in records:
+            rid = record_id(subject, record)
+            seen[rid] = seen.get(rid, 0) + 1
+            if seen[rid] > 1:
+                rid = f"{rid}#{seen[rid]}"
+            out.append((rid, subject, record))
+    return out
+
+def release_version(ids):
+    digest = hashlib.sha256('\n'.join(sorted(ids)).encode('utf-8'))
+    return digest.hexdigest()[:10]
+
+def load_history(release_dir):
+    path = os.path.join(release_dir, 'index.json')
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['versions']
+
+def load_release(release_dir, version):
+    with gzip.open(os.path.join(release_dir, f"{version}.json.gz"), 'rt', encoding='utf-8') as f:
+        return set(json.load(f))
+
+def save_release(release_dir, version, ids, history):
+    os.makedirs(release_dir, exist_ok=True)
+    release_file = os.path.join(release_dir, f"{version}.json.gz")
+    if not os.path.exists(release_file):
+        with gzip.GzipFile(release_file, 'wb', compresslevel=9, mtime=0) as f:
+            f.write(json.dumps(sorted(ids), separators=(',', ':')).encode('utf-8'))
+    with open(os.path.join(release_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump({'versions': history}, f, indent=2)
+
+    # Drop releases that fell out of the window
+    for name in os.listdir(release_dir):
+        if name.endswith('.json.gz') and name[:-len('.json.gz')] not in history:
+            os.remove(os.path.join(release_dir, name))
+
+def make_delta(previous, entries, level_name):
+    # previous: set of ids; entries: [(id, subject, record)] of the current release
+    added = {}
+    for rid, subject, record in entries:
+        if rid not in previous:
+            added.setdefault(subject, []).append(record)
+    added = cie_filenames.compact_grouped(added, level_name)
+    current_ids = {rid for rid, _, _ in entries}
+    return {'added': added, 'removed': sorted(previous - current_ids)}
+
+def apply_delta(grouped, delta, level_name):
+    # Reference patcher over full [y, s, t, c, u] records; added records are
+    # appended to their subject, so order within a subject can differ from a fresh build
+    removed = set(delta['removed'])
+    patched = {}
+    for rid, subject, record in record_ids(grouped):
+        if rid not in removed:
+            patched.setdefault(subject, []).append(record)
+    for subject, records in cie_filenames.expand_grouped(delta['added'], level_name).items():
+        patched.setdefault(subject, []).extend(records)
+    return patched
+
+def save_deltas(grouped, filepath, level_name):
+    # Records this release and writes a patch from each kept earlier one; returns the paths written
+    key = level_key(level_name)
+    release_dir = os.path.join(RELEASES_DIR, key)
+    delta_dir = os.path.join(DELTAS_DIR, key)
+
+    entries = record_ids(grouped)
+    ids = [rid for rid, _, _ in entries]
+    version = release_version(ids)
+
+    history = [v for v in load_history(release_dir) if v != version] + [version]
+    history = history[-(KEEP_VERSIONS + 1):]
+    save_release(release_dir, version, ids, history)
+
+    os.makedirs(delta_dir, exist_ok=True)
+    written = []
+    for old in history[:-1]:
+        delta = make_delta(load_release(release_dir, old), entries, level_name)
+        path = os.path.join(delta_dir, f"{old}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'from': old, 'to': version, **delta}, f, separators=(',', ':'))
+        written.append(path)
+        added = sum(len(records) for records in delta['added'].values())
+        print(f"Saved delta {path} (+{added} -{len(delta['removed'])} records)")
+
+    for name in os.listdir(delta_dir):
+        if name.endswith('.json') and name != 'index.json' and name[:-len('.json')] not in history[:-1]:
+            os.remove(os.path.join(delta_dir, name))
+            precompress.remove_sidecars(os.path.join(delta_dir, name))
+
+    index_path = os.path.join(delta_dir, 'index.json')
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump({'level': level_name, 'version': version, 'from': history[:-1]}, f, separators=(',', ':'))
+    written.append(index_path)
+    return written
@@ -2,8 +2,15 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import io
+import os
+import sys
 import streamlit.components.v1 as components
 
+# The frame cache and search index are shared with the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import frame_cache
+import frame_search
+
 # ==========================================
 # 1. PASTE YOUR DATA HERE
 # ==========================================
@@ -5791,21 +5798,48 @@ SUBJECT_MAP = {
 
 MONTH_ORDER = {"January": 1, "June": 2, "Summer": 2, "October": 3, "November": 3, "Autumn": 3, "Unknown": 4}
 
-@st.cache_data(show_spinner=False)
+CSV_FILE = 'ial_question_papers.csv'
+DISPLAY_COLUMNS = ['Year_Str', 'Session', 'Subject', 'Unit_Code', 'Type', 'Title', 'URL']
+
+@st.cache_resource(show_spinner=False)
 def load_and_process_data(csv_string):
+    # One frame and index shared by every session and rerun (main() only reads
+    # them), cached on disk by a hash of the CSV and this code, so only the
+    # first cold start after a change derives them
+    use_file = not csv_string or "PASTE ABOVE THIS LINE" in csv_string
     try:
-        if not csv_string or "PASTE ABOVE THIS LINE" in csv_string:
-             try:
-                 df = pd.read_csv('ial_question_papers.csv')
-             except:
-                 return None
+        if use_file:
+            key = frame_cache.source_key(files=[CSV_FILE, __file__])
         else:
-            df = pd.read_csv(io.StringIO(csv_string))
-            
-    except Exception as e:
-        st.error(f"Error parsing CSV data: {e}")
-        return None
+            key = frame_cache.source_key(files=[__file__], texts=[csv_string])
+    except OSError:
+        return None, None
 
+    df = frame_cache.read_frame('ial', key)
+    if df is None:
+        try:
+            if use_file:
+                try:
+                    df = pd.read_csv(CSV_FILE)
+                except:
+                    return None, None
+            else:
+                df = pd.read_csv(io.StringIO(csv_string))
+        except Exception as e:
+            st.error(f"Error parsing CSV data: {e}")
+            return None, None
+        df = process_data(df)
+        frame_cache.write_frame('ial', key, df)
+
+    index_key = frame_cache.source_key(files=[frame_search.__file__], texts=[key])
+    search_index = frame_cache.read_object('ial-index', index_key)
+    if search_index is None:
+        # Built on the sorted frame: the index holds row positions
+        search_index = frame_search.build_index(df['Search_Context'])
+        frame_cache.write_object('ial-index', index_key, search_index)
+    return df, frame_search.freeze(search_index)
+
+def process_data(df):
     # --- VECTORIZED PROCESSING ---
     if 'URL' in df.columns:
         df = df[~df['URL'].str.contains('/secure/', case=False, na=False)]
@@ -5916,7 +5950,7 @@ def main():
         st.title("⚡ IAL Paper Browser")
         st.markdown("Access IAL papers. **Drag table to scroll.**")
     
-    df = load_and_process_data(CSV_DATA)
+    df, search_index = load_and_process_data(CSV_DATA)
     
     if df is None:
         st.warning("⚠️ No data found. Please paste your CSV content into the `CSV_DATA` variable.")
@@ -5959,15 +5993,15 @@ def main():
         (df['Year_Num'] >= selected_years[0]) & 
         (df['Year_Num'] <= selected_years[1])
     )
-    filtered_df = df[mask]
 
     # --- SMART SEARCH BAR ---
     search_query = st.text_input("🔎 Search (e.g., 'Jan 2024 PH11')", placeholder="Type keywords...")
     
     if search_query:
         keywords = search_query.lower().split()
-        for term in keywords:
-            filtered_df = filtered_df[filtered_df['Search_Context'].str.contains(term, na=False)]
+        mask &= frame_search.row_mask(search_index, keywords)
+    # Positions into the shared frame; only the columns used below are copied for the matching rows
+    filtered_df = df[DISPLAY_COLUMNS + ['Year_Num']].iloc[np.flatnonzero(mask)]
 
     # --- METRICS ---
     m1, m2, m3, m4 = st.columns(4)
@@ -5990,10 +6024,8 @@ def main():
     st.divider()
 
     # --- DISPLAY TABLE ---
-    display_cols = ['Year_Str', 'Session', 'Subject', 'Unit_Code', 'Type', 'Title', 'URL']
-    
     st.dataframe(
-        filtered_df[display_cols],
+        filtered_df[DISPLAY_COLUMNS],
         column_config={
             "URL": st.column_config.LinkColumn("Download", display_text="Open PDF"),
             "Year_Str": st.column_config.TextColumn("Year", width="small"),
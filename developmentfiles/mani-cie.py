@@ -1,7 +1,17 @@
+import os
+import sys
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 
+# The filename parser, query parser and search index are shared with the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cie_filenames
+import frame_cache
+import frame_search
+import paper_query
+
 # ==========================================
 # 1. PAGE CONFIGURATION & PERMANENT DARK MODE
 # ==========================================
@@ -84,13 +94,12 @@ st.markdown("""
 # ==========================================
 # 2. DATA ENGINE
 # ==========================================
-@st.cache_data(show_spinner=False)
-def load_and_process_data():
-    try:
-        df = pd.read_csv('FULL_CIE_ARCHIVE.csv')
-    except:
-        return pd.DataFrame()
+CSV_FILE = 'FULL_CIE_ARCHIVE.csv'
 
+SESSION_MONTHS = {'January': 1, 'March': 3, 'June': 6, 'November': 11}
+DISPLAY_COLUMNS = ['Level', 'Year_Val', 'Session', 'Subject_Code', 'Subject_Name', 'Type_Category', 'Paper_Display', 'Full_URL']
+
+def process_data(df):
     df['Year_Val'] = pd.to_numeric(df['Year'], errors='coerce')
     df = df.dropna(subset=['Year_Val'])
     df['Year_Val'] = df['Year_Val'].astype(int)
@@ -103,30 +112,22 @@ def load_and_process_data():
     session_map = {'Feb/March': 'March', 'May/June': 'June', 'Oct/Nov': 'November'}
     df['Session'] = df['Extracted_Session'].map(session_map).fillna('Other')
 
-    df['Comp_Raw'] = pd.to_numeric(df['Extracted_Component'], errors='coerce').fillna(0).astype(int)
-    
+    # Extracted_Component, else the paper/variant in the filename (cie_filenames.component)
+    df['Comp_Raw'] = cie_filenames.component_series(df['Extracted_Component'], df['Filename'])
+
     def parse_component(val):
         if val == 0: return "-", ""
         s = str(val)
         if len(s) == 2: return s, f"Paper {s[0]} Variant {s[1]}"
         return s, f"Paper {s}"
 
-    comp_data = df['Comp_Raw'].apply(parse_component)
-    df['Paper_Display'] = comp_data.apply(lambda x: x[0])
-    df['Paper_Search_Name'] = comp_data.apply(lambda x: x[1])
-
-    def categorize_type(t, filename):
-        t, f = str(t).lower(), str(filename).lower()
-        if 'qp' in t or '_qp_' in f: return 'Question Paper'
-        if 'ms' in t or '_ms_' in f: return 'Mark Scheme'
-        if 'er' in t or '_er_' in f: return 'Examiner Report'
-        if 'gt' in t or '_gt_' in f: return 'Grade Thresholds'
-        if 'sp' in t or '_sp_' in f: return 'Specimen Paper'
-        if 'sy' in t or '_sy_' in f: return 'Syllabus'
-        if 'ir' in t or 'ci' in t or '_ir_' in f: return 'Instructions'
-        return 'Other'
+    # A few dozen distinct components, so the labels are built once each and mapped
+    comp_labels = {val: parse_component(val) for val in df['Comp_Raw'].unique()}
+    df['Paper_Display'] = df['Comp_Raw'].map({val: labels[0] for val, labels in comp_labels.items()})
+    df['Paper_Search_Name'] = df['Comp_Raw'].map({val: labels[1] for val, labels in comp_labels.items()})
 
-    df['Type_Category'] = df.apply(lambda row: categorize_type(row['Extracted_Type'], row['Filename']), axis=1)
+    # Labelled from Extracted_Type and the filename's type (cie_filenames.document_type)
+    df['Type_Category'] = cie_filenames.document_type_series(df['Extracted_Type'], df['Filename'])
 
     df['Search_Context'] = (
         df['Level'].astype(str) + " " + df['Subject_Name'].astype(str) + " " + 
@@ -138,11 +139,56 @@ def load_and_process_data():
     df.sort_values(by=['Year_Val', 'Subject_Name'], ascending=[False, True], inplace=True)
     return df
 
+def build_search_index(df):
+    # Row positions of the sorted frame; the columns are the ones
+    # paper_query.parse_query filters on
+    comp = df['Comp_Raw']
+    # Sittings the source gives no session for (1522_j21_qp_12.pdf) take the filename's
+    month = df['Session'].map(SESSION_MONTHS)
+    unknown = month.isna()
+    month[unknown] = cie_filenames.parse_series(df['Filename'][unknown])['session'].astype(float)
+    type_codes = {label: codes[0] for label, codes in cie_filenames.DOCUMENT_TYPES}
+    return frame_search.build_index(df['Search_Context'], {
+        'code': df['Subject_Code'],
+        'year': df['Year_Val'],
+        'sitting': df['Year_Val'] * 100 + month.fillna(0).astype(int),
+        'type': df['Type_Category'].map(type_codes),
+        'component': comp,
+        'paper': comp.where(comp < 10, comp // 10),
+        'variant': (comp % 10).where(comp >= 10).astype('Int64'),
+    })
+
+@st.cache_resource(show_spinner=False)
+def load_and_process_data():
+    # One frame and index shared by every session and rerun (main() only reads
+    # them), cached on disk by a hash of the CSV and this code, so only the
+    # first cold start after a change derives them
+    try:
+        key = frame_cache.source_key(files=[CSV_FILE, __file__, cie_filenames.__file__])
+    except OSError:
+        return pd.DataFrame(), None
+
+    df = frame_cache.read_frame('cie', key)
+    if df is None:
+        try:
+            df = pd.read_csv(CSV_FILE)
+        except:
+            return pd.DataFrame(), None
+        df = process_data(df)
+        frame_cache.write_frame('cie', key, df)
+
+    index_key = frame_cache.source_key(files=[frame_search.__file__], texts=[key])
+    search_index = frame_cache.read_object('cie-index', index_key)
+    if search_index is None:
+        search_index = build_search_index(df)
+        frame_cache.write_object('cie-index', index_key, search_index)
+    return df, frame_search.freeze(search_index)
+
 # ==========================================
 # 3. UI LAYOUT
 # ==========================================
 def main():
-    df = load_and_process_data()
+    df, search_index = load_and_process_data()
     
     with st.sidebar:
         st.markdown("### 🔍 Filters")
@@ -178,28 +224,33 @@ def main():
     st.title("⚡ CIE Paper Browser")
     
     if not df.empty:
-        filtered_df = df[
+        mask = (
             (df['Level'].isin(selected_levels)) & 
             (df['Type_Category'].isin(selected_types)) &
             (df['Year_Val'] >= year_range[0]) &
             (df['Year_Val'] <= year_range[1])
-        ]
+        )
         
         search_col, comp_col = st.columns([3, 1])
         with search_col:
-            search_query = st.text_input("", placeholder="Search (e.g. '0625 Physics')", label_visibility="collapsed")
+            search_query = st.text_input("", placeholder="Search (e.g. '0625 Physics' or '9709 s19 qp 32')", label_visibility="collapsed")
         
         if search_query:
-            clean_query = search_query.lower().replace("p", "paper ").replace("v", "variant ")
-            for term in clean_query.split():
-                filtered_df = filtered_df[filtered_df['Search_Context'].str.contains(term, na=False)]
+            # Codes, sessions (s19), types, papers and years filter exactly; other words match as text
+            filters, terms = paper_query.parse_query(
+                search_query, search_index['columns']['code'], search_index['columns']['year'])
+            mask &= frame_search.row_mask(search_index, terms, filters)
+        # Positions into the shared frame; only the shown columns of the matching rows are copied
+        rows = np.flatnonzero(mask)
+        paper_display = df['Paper_Display'].iloc[rows]
 
         with comp_col:
-            available_comps = sorted([c for c in filtered_df['Paper_Display'].unique() if c != "-"])
+            available_comps = sorted([c for c in paper_display.unique() if c != "-"])
             selected_comps = st.multiselect("", options=available_comps, placeholder="Component #", label_visibility="collapsed")
         
         if selected_comps:
-            filtered_df = filtered_df[filtered_df['Paper_Display'].isin(selected_comps)]
+            rows = rows[paper_display.isin(selected_comps).to_numpy()]
+        filtered_df = df[DISPLAY_COLUMNS].iloc[rows]
 
         # --- UPDATED METRICS LOGIC ---
         m1, m2, m3 = st.columns(3)
@@ -215,7 +266,7 @@ def main():
             m3.metric("Years", "N/A")
 
         st.dataframe(
-            filtered_df[['Level', 'Year_Val', 'Session', 'Subject_Code', 'Subject_Name', 'Type_Category', 'Paper_Display', 'Full_URL']],
+            filtered_df,
             column_config={
                 "Full_URL": st.column_config.LinkColumn("PDF", display_text="Open"),
                 "Year_Val": "Year", "Subject_Code": "Code", "Subject_Name": "Subject", "Type_Category": "Type", "Paper_Display": "#"
@@ -1,19 +1,15 @@
 import pandas as pd
-import io
 import json
-import re
 import os
 
-def extract_ial_data(file_path):
-    with open(file_path, 'r') as f:
-        content = f.read()
-    
-    # Find the CSV_DATA string
-    match = re.search(r'CSV_DATA = """(.*?)"""', content, re.DOTALL)
-    if match:
-        csv_content = match.group(1).strip()
-        df = pd.read_csv(io.StringIO(csv_content))
-        
+import build_report
+import ial_source
+
+def extract_ial_data(file_path=None):
+    # Streams the CSV_DATA block (or a sidecar CSV) and reuses the memoized
+    # parse when the source is unchanged
+    df = ial_source.read_ial_csv(file_path)
+    if df is not None:
         # Filter out 2025 papers
         # Extract year from Title
         df['Year'] = df['Title'].str.extract(r'(\d{4})')
@@ -86,20 +82,23 @@ def extract_cie_data(file_path):
         return df.to_dict(orient='records')
     return []
 
-# Extract IAL
-ial_data = extract_ial_data('developmentfiles/main-ial.py')
-if ial_data:
-    with open('public/ial_data.json', 'w') as f:
-        json.dump(ial_data, f, indent=2)
-    print(f"Extracted {len(ial_data)} IAL records to public/ial_data.json")
-
-# Extract CIE
-cie_data = extract_cie_data('developmentfiles/cie.csv')
-if cie_data:
-    with open('public/cie_data.json', 'w') as f:
-        json.dump(cie_data, f, indent=2)
-    print(f"Extracted {len(cie_data)} CIE records to public/cie_data.json")
-
+def save_records(records, output_file):
+    with open(output_file, 'w') as f:
+        json.dump(records, f, indent=2)
 
+if __name__ == "__main__":
+    # Extract IAL
+    with build_report.stage('extract_ial', inputs=[ial_source.default_source()], outputs=['public/ial_data.json']):
+        ial_data = extract_ial_data(ial_source.default_source())
+        if ial_data:
+            save_records(ial_data, 'public/ial_data.json')
+            print(f"Extracted {len(ial_data)} IAL records to public/ial_data.json")
 
+    # Extract CIE
+    with build_report.stage('extract_cie', inputs=['developmentfiles/cie.csv'], outputs=['public/cie_data.json']):
+        cie_data = extract_cie_data('developmentfiles/cie.csv')
+        if cie_data:
+            save_records(cie_data, 'public/cie_data.json')
+            print(f"Extracted {len(cie_data)} CIE records to public/cie_data.json")
 
+    build_report.finish()
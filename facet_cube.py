@@ -0,0 +1,89 @@
+import json
+import os
+
+import cie_filenames
+
+# Sparse facet count cube per level (optimize_data.py --emit facets).
+#
+# Counts records by subject x year x session x type x component, keeping only
+# the combinations that occur. Each dimension is a sorted dictionary and the
+# cells are stored column-wise as indexes into them:
+#
+#   {"version": 1, "level": ...,
+#    "dims": {"subject": [...], "year": [...], "session": [...], "type": [...], "component": [...]},
+#    "cells": {"subject": [...], "year": [...], "session": [...], "type": [...], "component": [...],
+#              "count": [...]}}
+#
+# Years are full years, sessions month numbers, a missing component is null.
+# A few thousand cells answer "Files / Subjects / Years" and per-facet counts
+# for any combination of facet filters without touching the records; see
+# summarize().
+
+VERSION = 1
+DIMS = ['subject', 'year', 'session', 'type', 'component']
+
+def sort_key(value):
+    # None first, then numbers, then text, so mixed dictionaries still sort
+    if value is None:
+        return (0, 0, '')
+    if isinstance(value, (int, float)):
+        return (1, value, '')
+    return (2, 0, str(value))
+
+def build_cube(grouped, level_name):
+    counts = {}
+    for subject, records in grouped.items():
+        for record in records:
+            y, s, t, c = record[:4]
+            year = 2000 + y if y < 50 else 1900 + y
+            key = (subject, year, s, t, cie_filenames.component_text(c) if c is not None else None)
+            counts[key] = counts.get(key, 0) + 1
+
+    dims = {name: sorted({key[i] for key in counts}, key=sort_key) for i, name in enumerate(DIMS)}
+    ids = {name: {value: i for i, value in enumerate(values)} for name, values in dims.items()}
+
+    cells = {name: [] for name in DIMS + ['count']}
+    for key in sorted(counts, key=lambda key: [ids[name][key[i]] for i, name in enumerate(DIMS)]):
+        for i, name in enumerate(DIMS):
+            cells[name].append(ids[name][key[i]])
+        cells['count'].append(counts[key])
+
+    return {'version': VERSION, 'level': level_name, 'dims': dims, 'cells': cells}
+
+def summarize(cube, filters=None):
+    # filters: {dim: set of values}; returns the metrics and per-facet counts of the matching records
+    dims = cube['dims']
+    cells = cube['cells']
+    wanted = {
+        name: {i for i, value in enumerate(dims[name]) if value in values}
+        for name, values in (filters or {}).items()
+    }
+
+    files = 0
+    facets = {name: {} for name in DIMS}
+    for row, count in enumerate(cells['count']):
+        if any(cells[name][row] not in allowed for name, allowed in wanted.items()):
+            continue
+        files += count
+        for name in DIMS:
+            value = dims[name][cells[name][row]]
+            facets[name][value] = facets[name].get(value, 0) + count
+
+    years = sorted(facets['year'])
+    return {
+        'files': files,
+        'subjects': len(facets['subject']),
+        'years': (years[0], years[-1]) if years else None,
+        'facets': facets,
+    }
+
+def save_facet_cube(grouped, filepath, level_name):
+    # Writes <base>.facets.json next to the JSON output and returns the paths written
+    base, _ = os.path.splitext(filepath)
+    cube_path = base + '.facets.json'
+    cube = build_cube(grouped, level_name)
+    json_str = json.dumps(cube, separators=(',', ':'))
+    with open(cube_path, 'w', encoding='utf-8') as f:
+        f.write(json_str)
+    print(f"Saved facet cube {cube_path} ({len(cube['cells']['count'])} cells, {len(json_str) / 1024:.0f} KB raw)")
+    return [cube_path]
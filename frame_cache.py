@@ -0,0 +1,113 @@
+import contextlib
+import hashlib
+import os
+import pickle
+
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.feather
+except ImportError:
+    pyarrow = None
+
+# On-disk cache of the Streamlit browsers' processed frames.
+#
+# st.cache_data only lives as long as the process, so every deploy, restart or
+# new worker re-read the CSV and re-derived every column. The loaders now key
+# the finished frame (and its frame_search index) by a hash of what they are
+# derived from (source CSV, loader code) and keep them under CACHE_DIR:
+#
+#   key = frame_cache.source_key(files=[csv_path, __file__])
+#   df = frame_cache.read_frame('cie', key)
+#   if df is None:
+#       df = process_data(pd.read_csv(csv_path))
+#       frame_cache.write_frame('cie', key, df)
+#
+# Frames are written as uncompressed Feather, which is read back memory-mapped
+# with no parsing; pyarrow is optional (pip install pyarrow) and without it a
+# pickle is used instead. Other values (the search index's NumPy arrays) are
+# pickled. A cache that cannot be read or written (read-only disk, a frame
+# Arrow cannot hold) only costs the rebuild.
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.frame_cache')
+FRAME_EXTENSION = '.feather' if pyarrow is not None else '.pkl'
+
+def source_key(files=(), texts=()):
+    # Hash of the given files' bytes and strings, plus the library versions the
+    # cached files depend on
+    digest = hashlib.sha256()
+    versions = [pd.__version__, pyarrow.__version__ if pyarrow is not None else '']
+    digest.update(' '.join(versions).encode('utf-8'))
+    for path in files:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    for text in texts:
+        digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+def cache_path(name, key, extension):
+    return os.path.join(CACHE_DIR, f"{name}-{key[:16]}{extension}")
+
+def read_cached(name, key, extension, read):
+    # read(path) for this name and key, or None when there is no usable entry
+    path = cache_path(name, key, extension)
+    if not os.path.exists(path):
+        return None
+    try:
+        return read(path)
+    except Exception as e:
+        print(f"Ignoring unreadable cache entry {path}: {e}")
+        return None
+
+def write_cached(name, key, extension, write):
+    # write(path) for this name and key, then removes the name's older entries
+    path = cache_path(name, key, extension)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Not caching {name}: {e}")
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        return None
+
+    for entry in os.listdir(CACHE_DIR):
+        # "<name>-<key>.<ext>", so 'cie' never matches 'cie-index' entries
+        if entry.rsplit('-', 1)[0] == name and os.path.join(CACHE_DIR, entry) != path:
+            # Another worker may be clearing the same entries
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(CACHE_DIR, entry))
+    return path
+
+def load_feather(path):
+    return pyarrow.feather.read_table(path, memory_map=True).to_pandas()
+
+def save_feather(df, path):
+    table = pyarrow.Table.from_pandas(df, preserve_index=True)
+    pyarrow.feather.write_feather(table, path, compression='uncompressed')
+
+def read_frame(name, key):
+    return read_cached(name, key, FRAME_EXTENSION, load_feather if pyarrow is not None else pd.read_pickle)
+
+def write_frame(name, key, df):
+    if pyarrow is not None:
+        return write_cached(name, key, FRAME_EXTENSION, lambda path: save_feather(df, path))
+    return write_cached(name, key, FRAME_EXTENSION, df.to_pickle)
+
+def load_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def save_pickle(value, path):
+    with open(path, 'wb') as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def read_object(name, key):
+    return read_cached(name, key, '.pickle', load_pickle)
+
+def write_object(name, key, value):
+    return write_cached(name, key, '.pickle', lambda path: save_pickle(value, path))
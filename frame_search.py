@@ -0,0 +1,130 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+# Token index over a DataFrame's Search_Context column, for the Streamlit browsers.
+#
+# Built once by the loaders (and cached with the frame) instead of running
+# Search_Context.str.contains(term) over every row for every query term:
+#
+#   rows    row positions (int32), grouped by token, sorted within each token
+#   offsets token i's rows are rows[offsets[i]:offsets[i + 1]]
+#   suffixes every suffix of every token, sorted, with owners[j] the token of suffixes[j]
+#   size    number of rows indexed
+#   columns column name -> {value: row positions}, for exact filters
+#
+# A query term matches the rows with a whitespace-separated token containing
+# it, as str.contains did: the tokens containing a term are those with a
+# suffix starting with it, one binary search away in `suffixes`. Terms are
+# then intersected smallest first, so a selective query touches only its
+# own rows rather than the whole archive. Filters on indexed columns (see
+# paper_query.py) are resolved the same way, from the rows stored per value.
+
+EMPTY = np.zeros(0, dtype=np.int32)
+# Sorts after every character a token can hold, to close prefix ranges
+PREFIX_END = '\U0010ffff'
+# A term matching more than 1/DENSE_FRACTION of the rows is merged with a mask
+DENSE_FRACTION = 8
+
+def build_column_index(values):
+    # value -> sorted row positions, for a low-cardinality Series; missing values are left out
+    codes, uniques = pd.factorize(values)
+    order = np.argsort(codes, kind='stable').astype(np.int32)
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques.tolist())}
+
+def freeze(index):
+    # Marks the index's arrays read-only, for an index shared between sessions;
+    # search() hands out slices of them
+    arrays = [index['rows'], index['offsets'], index['suffixes'], index['owners']]
+    arrays += [rows for column in index['columns'].values() for rows in column.values()]
+    for array in arrays:
+        array.flags.writeable = False
+    return index
+
+def build_index(texts, columns=None):
+    # texts: Series of (lowercase) strings, in the frame's row order;
+    # columns: optional {name: Series} to index for exact filters
+    tokens = texts.fillna('').astype(str).str.split().tolist()
+    lengths = np.fromiter((len(row) for row in tokens), dtype=np.int64, count=len(tokens))
+    rows = np.repeat(np.arange(len(tokens), dtype=np.int32), lengths)
+    codes, vocab = pd.factorize(pd.Series(list(itertools.chain.from_iterable(tokens)), dtype=object))
+
+    # Group by token (stable, so rows stay ascending) and drop repeats of a
+    # token within a row
+    order = np.argsort(codes, kind='stable')
+    codes, rows = codes[order], rows[order]
+    keep = np.ones(len(rows), dtype=bool)
+    keep[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+    codes, rows = codes[keep], rows[keep]
+    offsets = np.searchsorted(codes, np.arange(len(vocab) + 1))
+
+    suffixes = [token[i:] for token in vocab for i in range(len(token))]
+    owners = np.repeat(np.arange(len(vocab), dtype=np.int32),
+                       np.fromiter((len(token) for token in vocab), dtype=np.int64, count=len(vocab)))
+    suffixes = np.array(suffixes, dtype=str)
+    order = np.argsort(suffixes, kind='stable')
+
+    return {
+        'rows': rows,
+        'offsets': offsets,
+        'suffixes': suffixes[order],
+        'owners': owners[order],
+        'size': len(tokens),
+        'columns': {name: build_column_index(values) for name, values in (columns or {}).items()},
+    }
+
+def term_rows(index, term):
+    # Sorted positions of the rows with a token containing `term`
+    suffixes = index['suffixes']
+    lo = np.searchsorted(suffixes, term, 'left')
+    hi = np.searchsorted(suffixes, term + PREFIX_END, 'left')
+    owners = np.unique(index['owners'][lo:hi])
+    if not len(owners):
+        return EMPTY
+    rows, offsets = index['rows'], index['offsets']
+    starts, ends = offsets[owners], offsets[owners + 1]
+    if len(owners) == 1:
+        return rows[starts[0]:ends[0]]
+
+    # Every matching token's rows in one gather, then merged; a short term
+    # ("e") can match most of the archive, which a mask merges in linear time
+    lengths = ends - starts
+    matched = rows[np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())]
+    if len(matched) * DENSE_FRACTION > index['size']:
+        mask = np.zeros(index['size'], dtype=bool)
+        mask[matched] = True
+        return np.flatnonzero(mask)
+    return np.unique(matched)
+
+def column_rows(index, name, values):
+    # Sorted positions of the rows whose `name` column holds any of `values`
+    column = index['columns'][name]
+    parts = [column[value] for value in values if value in column]
+    if not parts:
+        return EMPTY
+    return parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+def search(index, terms, filters=None):
+    # Sorted positions of the rows matching every term and every filter
+    # ({column: values}); all rows for neither
+    matches = [term_rows(index, term) for term in terms]
+    matches += [column_rows(index, name, values) for name, values in (filters or {}).items()]
+    matches.sort(key=len)
+    if not matches:
+        return np.arange(index['size'], dtype=np.int32)
+    result = matches[0]
+    for rows in matches[1:]:
+        if not len(result):
+            break
+        # Smallest first: each surviving row is one binary search into the next term's rows
+        found = np.searchsorted(rows, result)
+        result = result[rows[np.minimum(found, len(rows) - 1)] == result]
+    return result
+
+def row_mask(index, terms, filters=None):
+    # search() as a boolean mask over the frame's rows, to combine with other filters
+    mask = np.zeros(index['size'], dtype=bool)
+    mask[search(index, terms, filters)] = True
+    return mask
@@ -0,0 +1,66 @@
+# Path-prefix dictionary for IAL URLs.
+#
+# Every IAL record links to a full Pearson URL, and the ~5000 records share
+# fewer than a hundred directories. ial.json therefore stores each directory
+# once, as a trie of path segments:
+#
+#   "prefixes": [[parent, segment], ...]      parent is an earlier index, or -1
+#
+# and each record as [y, s, t, c, leaf, prefix_id], where the URL is the
+# prefix's path + "/" + leaf. Records without a URL, or whose URL has no "/",
+# stay as [y, s, t, c, u]. The client mirrors decode_url in src/ialUrls.js.
+
+def build_prefixes(urls):
+    # Returns (prefixes, {directory: prefix_id}) for the directories of `urls`
+    prefixes = []
+    nodes = {}
+    dir_ids = {}
+    for url in urls:
+        if not url or '/' not in url:
+            continue
+        directory = url.rsplit('/', 1)[0]
+        if directory in dir_ids:
+            continue
+        parent = -1
+        for segment in directory.split('/'):
+            key = (parent, segment)
+            if key not in nodes:
+                nodes[key] = len(prefixes)
+                prefixes.append([parent, segment])
+            parent = nodes[key]
+        dir_ids[directory] = parent
+    return prefixes, dir_ids
+
+def encode_grouped(grouped):
+    # Returns (prefixes, grouped) with URLs split into leaf + prefix id
+    urls = (record[4] for records in grouped.values() for record in records)
+    prefixes, dir_ids = build_prefixes(urls)
+
+    encoded = {}
+    for subject, records in grouped.items():
+        encoded[subject] = []
+        for record in records:
+            y, s, t, c, u = record
+            if u and '/' in u:
+                directory, leaf = u.rsplit('/', 1)
+                encoded[subject].append([y, s, t, c, leaf, dir_ids[directory]])
+            else:
+                encoded[subject].append(record)
+    return prefixes, encoded
+
+def prefix_paths(prefixes):
+    paths = []
+    for parent, segment in prefixes:
+        paths.append(segment if parent < 0 else paths[parent] + '/' + segment)
+    return paths
+
+def decode_grouped(prefixes, grouped):
+    # Reference decoder: rebuilds the full [y, s, t, c, url] records
+    paths = prefix_paths(prefixes)
+    return {
+        subject: [
+            record[:4] + [paths[record[5]] + '/' + record[4]] if len(record) > 5 else record
+            for record in records
+        ]
+        for subject, records in grouped.items()
+    }
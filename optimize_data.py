@@ -1,14 +1,21 @@
+import argparse
 import json
 import os
-import re
+from concurrent.futures import ProcessPoolExecutor
+
+import build_report
+import cie_filenames
+import columnar
+import deltas
+import facet_cube
+import ial_urls
+import paper_record
+import precompress
+import search_index
+import subject_shards
 
 # Session mapping
-SESSION_MAP = {
-    "January": 1, "February": 2, "March": 3, "April": 4, "May": 5, "June": 6,
-    "July": 7, "August": 8, "September": 9, "October": 10, "November": 11, "December": 12,
-    "Feb/March": 3, "May/June": 6, "Oct/Nov": 11,
-    "Winter": 11, "Summer": 6
-}
+SESSION_MAP = paper_record.SESSION_MONTHS
 
 FILES = {
     "IGCSE": "public/cie_IGCSE.json",
@@ -17,33 +24,50 @@ FILES = {
     "IAL": "public/ial_data.json"
 }
 
+# Deployed names the web client fetches (see DATA_CONFIG in src/App.jsx)
+OUTPUTS = {
+    "IGCSE": "public/igcse.json",
+    "O Level": "public/olevel.json",
+    "AS and A Level": "public/alevel.json",
+    "IAL": "public/ial.json"
+}
+
+# Optional outputs written next to each level's JSON, selected with --emit.
+# Each writer takes (grouped, filepath, level_name), with full [y, s, t, c, u]
+# records, and returns the list of paths it wrote.
+EXTRA_OUTPUTS = {
+    'binary': columnar.save_binary,
+    'subjects': subject_shards.save_subject_shards,
+    'deltas': deltas.save_deltas,
+    'search': search_index.save_search_index,
+    'facets': facet_cube.save_facet_cube,
+}
+
+# Steps run over the files a level wrote, also selected with --emit.
+# Each takes the list of paths and returns the extra paths it wrote.
+POST_OUTPUTS = {
+    'precompressed': precompress.precompress_outputs,
+}
+
+# Chunk budget, in gzip-compressed bytes since that is what the network pays:
+# a level is split once it exceeds SPLIT_BYTES, into chunks of up to CHUNK_BYTES.
+# The client fetches at most MAX_CHUNKS chunks (fetchLevelData in src/App.jsx),
+# so a level too big for that many gets bigger chunks rather than more of them
+SPLIT_BYTES = 120 * 1024
+CHUNK_BYTES = 100 * 1024
+MAX_CHUNKS = 5
+
 def get_filename(url):
     if not url: return ""
     return url.split('/')[-1]
 
 def extract_component(filename):
-    # Try to extract component from filename like 0452_m15_ms_12.pdf -> 12
-    # or 9709_s18_qp_42.pdf -> 42
-    # Pattern: _[0-9]{2}.pdf or _[0-9]{2}_
-    match = re.search(r'_(\d{2})\.pdf$', filename)
-    if match:
-        return match.group(1)
-    match = re.search(r'_(\d{2})_', filename)
-    if match:
-        return match.group(1)
-    return None
-
-def process_file(filepath, level_name):
-    if not os.path.exists(filepath):
-        print(f"File not found: {filepath}")
-        return
+    # 0452_m15_ms_12.pdf -> 12, see cie_filenames.parse_filename
+    return cie_filenames.filename_component(filename)
 
-    print(f"Processing {filepath}...")
-    
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        
-    grouped = {}
+def source_rows(data):
+    # Returns {subject: [PaperRecord, ...]} for either input format
+    rows_by_subject = {}
     
     # Check format
     if isinstance(data, dict) and 'subjects' in data:
@@ -51,9 +75,8 @@ def process_file(filepath, level_name):
         subjects = data['subjects']
         sessions = data['sessions'] if 'sessions' in data else []
         types = data['types'] if 'types' in data else []
-        rows = data['data']
         
-        for row in rows:
+        for row in data['data']:
             # row: [subj_idx, year, sess_idx, type_idx, url, unit]
             subj_idx = row[0]
             year = row[1]
@@ -65,106 +88,214 @@ def process_file(filepath, level_name):
             session_str = sessions[sess_idx] if sess_idx < len(sessions) else ""
             type_str = types[type_idx] if type_idx < len(types) else ""
             
-            filename = get_filename(url)
-            component = extract_component(filename)
-            
-            try:
-                y_short = int(str(year)[-2:]) if year and str(year).isdigit() else 0
-            except:
-                y_short = 0
-            s_short = SESSION_MAP.get(session_str, 0)
-            
-            # [y, s, t, c, u]
-            record = [y_short, s_short, type_str, component, filename]
-            
-            if subject not in grouped:
-                grouped[subject] = []
-            grouped[subject].append(record)
+            # Component is always re-derived from the filename in this format
+            rows_by_subject.setdefault(subject, []).append(
+                paper_record.PaperRecord(subject, year, session_str, type_str, None, url))
             
     elif isinstance(data, list):
         print("Detected flat list format")
         for item in data:
-            # Handle short keys from previous optimization
-            subject = item.get('Subject') or item.get('S') or item.get('Unit_Code') or item.get('uc')
-            if not subject: continue
-            
-            year = item.get('Year') or item.get('y')
-            session = item.get('Session') or item.get('s')
-            type_ = item.get('Type') or item.get('t')
-            url = item.get('URL') or item.get('u')
-            component = item.get('Component') or item.get('C')
-            
-            filename = get_filename(url)
-            if not component:
-                component = extract_component(filename)
-                
-            try:
-                y_short = int(str(year)[-2:]) if year and str(year).isdigit() else 0
-            except:
-                y_short = 0
-            s_short = SESSION_MAP.get(session, 0)
+            # Long (CIE or IAL) and short keys from previous optimization
+            record = paper_record.from_item(item)
+            if not record.subject: continue
             
-            # For IAL, keep full URL as it is not reconstructible
-            # For CIE, keep filename
-            url_to_store = url if level_name == 'IAL' else filename
-            
-            record = [y_short, s_short, type_, component, url_to_store]
-            
-            if subject not in grouped:
-                grouped[subject] = []
-            grouped[subject].append(record)
+            rows_by_subject.setdefault(record.subject, []).append(record)
             
+    return rows_by_subject
+
+def make_record(record, level_name):
+    # PaperRecord -> the [y, s, t, c, u] row the shards ship
+    filename = get_filename(record.url)
+    component = record.component or extract_component(filename)
+    y_short = record.year % 100 if record.year else 0
+    
+    # For IAL, keep full URL as it is not reconstructible
+    # For CIE, keep filename
+    url_to_store = record.url if level_name == 'IAL' else filename
+    
+    # [y, s, t, c, u]
+    return [y_short, record.month, record.type_name, component, url_to_store]
+
+def group_records(rows_by_subject, level_name):
+    grouped = {}
+    for subject, rows in rows_by_subject.items():
+        grouped[subject] = [make_record(row, level_name) for row in rows]
+    return grouped
+
+def process_file(filepath, level_name, output_path=None, extras=()):
+    if not os.path.exists(filepath):
+        print(f"File not found: {filepath}")
+        return
+
+    print(f"Processing {filepath}...")
+    
+    with build_report.stage('optimize.parse', level_name, inputs=[filepath]):
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+    with build_report.stage('optimize.records', level_name):
+        grouped = group_records(source_rows(data), level_name)
+    return save_level(grouped, output_path or filepath, level_name, extras)
+
+def compact_level(grouped, level_name):
+    # Returns (grouped, envelope) as shipped: template-derived CIE filenames are
+    # dropped, and IAL URLs become a prefix id + leaf against a shared dictionary
+    if level_name == 'IAL':
+        prefixes, encoded = ial_urls.encode_grouped(grouped)
+        return encoded, {'prefixes': prefixes}
+    return cie_filenames.compact_grouped(grouped, level_name), None
+
+def save_level(grouped, filepath, level_name, extras=()):
+    # Extra writers get the full [y, s, t, c, u] records
+    with build_report.stage('optimize.write', level_name) as entry:
+        compact, envelope = compact_level(grouped, level_name)
+        written = save_grouped(compact, filepath, level_name, envelope)
+        entry['outputs'].extend(written)
+    for name in extras:
+        if name in EXTRA_OUTPUTS:
+            with build_report.stage(f'emit.{name}', level_name) as entry:
+                paths = EXTRA_OUTPUTS[name](grouped, filepath, level_name)
+                entry['outputs'].extend(paths)
+            written.extend(paths)
+    for name in extras:
+        if name in POST_OUTPUTS:
+            with build_report.stage(f'emit.{name}', level_name) as entry:
+                paths = POST_OUTPUTS[name](list(written))
+                entry['outputs'].extend(paths)
+            written.extend(paths)
+    return written
+
+def save_grouped(grouped, filepath, level_name, envelope=None):
     # Split and Save
-    json_str = json.dumps(grouped, separators=(',', ':'))
-    size_mb = len(json_str) / (1024 * 1024)
-    print(f"Total size for {level_name}: {size_mb:.2f} MB")
+    # With an envelope every file is {**envelope, "data": {subject: records}}
+    # so each chunk carries the dictionaries it needs
+    # Returns the list of files written
+    #
+    # Each subject is serialized exactly once; the same text is used to size it
+    # and is spliced into whichever file it lands in, byte-identical to
+    # json.dumps of that file's dict
+    entries = {
+        subj: json.dumps(subj) + ':' + json.dumps(records, separators=(',', ':'))
+        for subj, records in grouped.items()
+    }
+
+    json_str = assemble(list(entries.values()), envelope)
+    size = precompress.compressed_size(json_str)
+    split = size > SPLIT_BYTES
+    print(f"Total size for {level_name}: {len(json_str) / 1024:.0f} KB raw, {size / 1024:.0f} KB gzip")
     
-    if size_mb > 0.95:
+    written = []
+    if split:
         print(f"Splitting {level_name}...")
-        chunks = {}
-        current_chunk_idx = 1
-        current_chunk_size = 0
-        current_chunk_data = {}
-        
-        sorted_subjects = sorted(grouped.keys())
-        
-        for subj in sorted_subjects:
-            subj_data = grouped[subj]
-            subj_str = json.dumps({subj: subj_data}, separators=(',', ':'))
-            subj_size = len(subj_str)
-            
-            if current_chunk_size + subj_size > 800 * 1024:
-                save_chunk(filepath, current_chunk_idx, current_chunk_data)
-                current_chunk_idx += 1
-                current_chunk_data = {}
-                current_chunk_size = 0
-            
-            current_chunk_data[subj] = subj_data
-            current_chunk_size += subj_size
-            
-        if current_chunk_data:
-            save_chunk(filepath, current_chunk_idx, current_chunk_data)
+        sizes = {subj: precompress.compressed_size(entry) for subj, entry in entries.items()}
+        chunks = pack_chunks(sizes, CHUNK_BYTES, MAX_CHUNKS)
+        if len(chunks) == MAX_CHUNKS and sum(sizes.values()) > MAX_CHUNKS * CHUNK_BYTES:
+            print(f"Warning: {level_name} needs more than {MAX_CHUNKS} chunks of {CHUNK_BYTES // 1024} KB; chunks exceed the budget")
+        for idx, chunk in enumerate(chunks, start=1):
+            written.append(save_chunk(filepath, idx, assemble([entries[subj] for subj in chunk], envelope)))
             
         if os.path.exists(filepath):
             os.remove(filepath)
+        precompress.remove_sidecars(filepath)
         print(f"Removed original {filepath}")
         
     else:
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(json_str)
+        written.append(filepath)
         print(f"Saved optimized {filepath}")
 
-def save_chunk(original_path, idx, data):
-    base, ext = os.path.splitext(original_path)
-    new_path = f"{base}_{idx}{ext}"
+    remove_stale_chunks(filepath, len(written) if split else 0)
+    return written
+
+def assemble(entries, envelope=None):
+    # Joins pre-serialized '"subject":[...]' entries into a file's JSON text
+    body = '{' + ','.join(entries) + '}'
+    if not envelope:
+        return body
+    return json.dumps(envelope, separators=(',', ':'))[:-1] + ',"data":' + body + '}'
+
+def pack_chunks(sizes, budget, max_chunks=MAX_CHUNKS):
+    # Packs subjects into the fewest chunks that fit the budget, balanced so
+    # the chunks download in roughly equal time. Starts from the lower bound
+    # and uses longest-first assignment to the lightest chunk, adding a chunk
+    # whenever that overflows, up to max_chunks. Returns lists of subjects, each
+    # sorted by name. Compressing subjects separately overestimates a chunk,
+    # erring on the small side.
+    count = min(max(1, -(-sum(sizes.values()) // budget)), max_chunks)
+    order = sorted(sizes, key=lambda subj: (-sizes[subj], subj))
+    while True:
+        chunks = [[] for _ in range(count)]
+        loads = [0] * count
+        for subj in order:
+            idx = loads.index(min(loads))
+            chunks[idx].append(subj)
+            loads[idx] += sizes[subj]
+        if max(loads) <= budget or count >= min(len(order), max_chunks):
+            break
+        count += 1
+    chunks = [sorted(chunk) for chunk in chunks if chunk]
+    # Keep chunk numbering stable: order chunks by their first subject
+    return sorted(chunks, key=lambda chunk: chunk[0])
+
+def save_chunk(original_path, idx, json_str):
+    new_path = chunk_path(original_path, idx)
     with open(new_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, separators=(',', ':'))
-    print(f"Saved chunk {new_path}")
+        f.write(json_str)
+    print(f"Saved chunk {new_path} ({len(json_str) / 1024:.0f} KB raw)")
+    return new_path
+
+def chunk_path(original_path, idx):
+    base, ext = os.path.splitext(original_path)
+    return f"{base}_{idx}{ext}"
+
+def remove_stale_chunks(original_path, keep):
+    # The client fetches _1 to _MAX_CHUNKS and stops at the first that is
+    # missing, so a leftover from a previous, larger build would be loaded as
+    # part of this one
+    idx = keep + 1
+    while os.path.exists(chunk_path(original_path, idx)):
+        os.remove(chunk_path(original_path, idx))
+        precompress.remove_sidecars(chunk_path(original_path, idx))
+        print(f"Removed stale chunk {chunk_path(original_path, idx)}")
+        idx += 1
+
+def process_files_parallel(files, jobs, extras=(), outputs=None):
+    # Each level runs whole (parse -> records -> save) on a worker, largest
+    # first so the biggest level is not left for last. Only the paths cross
+    # the process boundary: shipping records to workers to build costs more
+    # in pickling than building them does. `outputs` maps a level to its
+    # output path, default in place as in process_file
+    present = [level for level, path in files.items() if os.path.exists(path)]
+    for level, path in files.items():
+        if level not in present:
+            print(f"File not found: {path}")
+    present.sort(key=lambda level: -os.path.getsize(files[level]))
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(present)) or 1) as pool:
+        futures = [
+            pool.submit(process_file, files[level], level, (outputs or {}).get(level), extras)
+            for level in present
+        ]
+        return [path for future in futures for path in future.result() or []]
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regroup the level files into subject-keyed shards")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="Worker processes to use (default: 1, serial)")
+    parser.add_argument('--emit', action='append', choices=list(EXTRA_OUTPUTS) + list(POST_OUTPUTS), default=[],
+                        help="Extra output to write next to each level (repeatable)")
+    args = parser.parse_args()
+
     if os.path.exists("public/cie_data.json"):
         os.remove("public/cie_data.json")
         print("Deleted public/cie_data.json")
 
-    for level, path in FILES.items():
-        process_file(path, level)
+    if args.jobs > 1:
+        with build_report.stage('optimize', inputs=list(FILES.values())):
+            process_files_parallel(FILES, args.jobs, args.emit)
+    else:
+        for level, path in FILES.items():
+            with build_report.stage('optimize', level, inputs=[path]) as entry:
+                entry['outputs'].extend(process_file(path, level, None, args.emit) or [])
+    build_report.finish()
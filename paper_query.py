@@ -0,0 +1,95 @@
+import re
+
+import cie_filenames
+
+# Structured search queries for the CIE browser: "9709 s19 qp 32" becomes exact
+# filters on indexed columns (frame_search.column_rows) instead of four
+# substring scans. parse_query recognises
+#
+#   9709                    subject code          code    '9709'
+#   s19, m20, w21           session + year        sitting 201906 (year * 100 + month)
+#   2019, 2015-2019, 15-19  year / year range     year    2019, 2015..2019
+#   qp ms er gt sp sy ir ci document type         type    'qp', ..., 'ir' ('ci' is 'ir')
+#   32, p3v2, paper 3 variant 2                   component 32
+#   3, p3, paper 3          paper                 paper   3
+#   v2, variant 2           variant               variant 2
+#
+# Filenames split into the same tokens (9709_s19_qp_32.pdf). Values of one
+# column are alternatives, columns are combined, and every other word is left
+# for text search. A 4-digit number that is both a subject code and a year
+# (2010) is left as text too, matching either, and so is a bare 2-digit number
+# that could be a year in the data (15 for 2015 or paper 1 variant 5). A range
+# with a 2-digit end (15-19) is a year range only when both ends are years in
+# the data, so "32 - 33" stays two components.
+
+TYPE_CODES = {'qp': 'qp', 'ms': 'ms', 'er': 'er', 'gt': 'gt', 'sp': 'sp', 'sy': 'sy', 'ir': 'ir', 'ci': 'ir'}
+YEAR_RE = re.compile(r'^(?:19|20)\d{2}$')
+YEAR_RANGE_RE = re.compile(r'\b((?:19|20)?\d{2})\s*(?:-|–|\.\.|to)\s*((?:19|20)?\d{2})\b')
+SITTING_RE = re.compile(r'^([%s])(\d{2})$' % ''.join(cie_filenames.LETTER_SESSIONS))
+# "paper 3 variant 2" -> "p3 v2"
+SPELLED_RE = re.compile(r'\b(p|v)(?:aper|ariant)?\s+(\d)\b')
+PAPER_RE = re.compile(r'^p(\d)(?:v(\d))?$')
+VARIANT_RE = re.compile(r'^v(\d)$')
+COMPONENT_RE = re.compile(r'^[1-9]\d?$')
+
+def range_year(text):
+    # "2019" -> 2019, "19" -> 2019
+    return int(text) if len(text) == 4 else cie_filenames.full_year(int(text))
+
+def short_year(token, years):
+    # Whether a 2-digit number names a year in the data ("15" with 2015 present)
+    return len(token) == 2 and token.isdigit() and cie_filenames.full_year(int(token)) in years
+
+def parse_query(query, codes=(), years=()):
+    # -> (filters, terms): filters maps a column to the set of values a row may
+    # hold there, terms are the remaining lowercase words. `codes` and `years`
+    # are the subject codes and years in the data, to tell 9709 from 2019
+    filters = {}
+    terms = []
+
+    def add(column, *values):
+        filters.setdefault(column, set()).update(values)
+
+    def year_range(match):
+        ends = match.groups()
+        if not all(len(end) == 4 or short_year(end, years) for end in ends):
+            return match.group(0)
+        first, last = range_year(ends[0]), range_year(ends[1])
+        add('year', *range(min(first, last), max(first, last) + 1))
+        return ' '
+
+    query = query.lower().replace('.pdf', ' ').replace('_', ' ')
+    query = SPELLED_RE.sub(r'\1\2', YEAR_RANGE_RE.sub(year_range, query))
+
+    for token in query.split():
+        sitting = SITTING_RE.match(token)
+        paper = PAPER_RE.match(token)
+        variant = VARIANT_RE.match(token)
+        if token.isdigit() and len(token) == 4:
+            is_code, is_year = token in codes, bool(YEAR_RE.match(token)) and int(token) in years
+            if is_code and not is_year:
+                add('code', token)
+            elif is_year and not is_code:
+                add('year', int(token))
+            else:
+                terms.append(token)
+        elif sitting:
+            letter, yy = sitting.groups()
+            add('sitting', cie_filenames.full_year(int(yy)) * 100 + cie_filenames.LETTER_SESSIONS[letter])
+        elif token in TYPE_CODES:
+            add('type', TYPE_CODES[token])
+        elif short_year(token, years):
+            terms.append(token)
+        elif COMPONENT_RE.match(token):
+            add('component' if len(token) == 2 else 'paper', int(token))
+        elif paper:
+            number, variant_number = paper.groups()
+            if variant_number:
+                add('component', int(number + variant_number))
+            else:
+                add('paper', int(number))
+        elif variant:
+            add('variant', int(variant.group(1)))
+        else:
+            terms.append(token)
+    return filters, terms
@@ -0,0 +1,155 @@
+import itertools
+import json
+import sys
+
+# The record every pipeline stage works on.
+#
+# convert_cie_csv builds PaperRecords from cie.csv rows; clean, split, compress
+# and optimize read their JSON inputs straight into them and write their usual
+# formats back out. Sessions and types are small integer codes into the shared
+# SESSIONS / TYPES tables, years and units are numbers (None when unknown) and
+# the strings every record of a subject repeats are interned, so a level held
+# in memory is a fraction of the size of the per-item dicts it replaces.
+#
+# The JSON the stages exchange is unchanged. An item's layout is recognised
+# from one key (ITEM_KEYS), so no field needs an `a or b or c` fallback chain:
+#
+#   cie    {"Category", "Subject", "Year", "Session", "Type", "Component", "URL", "Unit"}
+#   ial    {"Unit_Code", "Title", "URL", "Year", "Session", "Type"}   (extract_data.py)
+#   short  {"S" | "uc", "y", "s", "t", "u", "U", "C", "T"}            (older optimized files)
+
+# Session name -> month, shared with the [y, s, t, c, u] shard rows
+SESSION_MONTHS = {
+    "January": 1, "February": 2, "March": 3, "April": 4, "May": 5, "June": 6,
+    "July": 7, "August": 8, "September": 9, "October": 10, "November": 11, "December": 12,
+    "Feb/March": 3, "May/June": 6, "Oct/Nov": 11,
+    "Winter": 11, "Summer": 6
+}
+
+# Code tables. Names outside them get the next free code the first time they
+# are seen, so any source value round-trips
+SESSIONS = [None, ''] + list(SESSION_MONTHS)
+TYPES = [None, '', 'qp', 'ms', 'er', 'gt', 'insert', 'ci', 'other']
+SESSION_CODES = {name: code for code, name in enumerate(SESSIONS)}
+TYPE_CODES = {name: code for code, name in enumerate(TYPES)}
+
+# Item keys per layout, in PaperRecord argument order
+# (subject, year, session, type, component, url, category, unit, title)
+CIE_KEYS = ('Subject', 'Year', 'Session', 'Type', 'Component', 'URL', 'Category', 'Unit', None)
+IAL_KEYS = ('Unit_Code', 'Year', 'Session', 'Type', None, 'URL', None, None, 'Title')
+SHORT_KEYS = ('S', 'y', 's', 't', 'C', 'u', None, 'U', 'T')
+SHORT_IAL_KEYS = ('uc',) + SHORT_KEYS[1:]
+ITEM_KEYS = [('Category', CIE_KEYS), ('Unit_Code', IAL_KEYS), ('uc', SHORT_IAL_KEYS)]
+
+def code(codes, names, name):
+    value = codes.get(name)
+    if value is None:
+        value = codes[name] = len(names)
+        names.append(name)
+    return value
+
+def parse_year(value):
+    # 2019, "2019" -> 2019; "Unknown", "", None -> None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+SHARED_VALUES = {}
+
+def shared(value):
+    # One object per distinct string or number (keyed by type, so 1 and 1.0 stay apart)
+    if isinstance(value, str):
+        return sys.intern(value)
+    if value is None or value != value:
+        return value
+    return SHARED_VALUES.setdefault((type(value), value), value)
+
+class PaperRecord:
+    __slots__ = ('subject', 'year', 'session', 'type', 'component', 'url', 'category', 'unit', 'title')
+
+    def __init__(self, subject=None, year=None, session=None, type_=None, component=None,
+                 url=None, category=None, unit=None, title=None):
+        self.subject = shared(subject)
+        self.year = shared(parse_year(year))
+        self.session = code(SESSION_CODES, SESSIONS, session)
+        self.type = code(TYPE_CODES, TYPES, type_)
+        self.component = shared(component) or None
+        self.url = url
+        self.category = shared(category)
+        self.unit = shared(unit)
+        self.title = title
+
+    @property
+    def session_name(self):
+        return SESSIONS[self.session]
+
+    @property
+    def type_name(self):
+        return TYPES[self.type]
+
+    @property
+    def month(self):
+        return SESSION_MONTHS.get(SESSIONS[self.session], 0)
+
+    def key(self):
+        # What make_record reads, for cache keys
+        return [self.year, SESSIONS[self.session], TYPES[self.type], self.component, self.url]
+
+    def to_item(self):
+        # The cie layout convert_cie_csv writes and clean / split pass on
+        return {
+            "Category": self.category,
+            "Subject": self.subject,
+            "Year": self.year if self.year is not None else 'Unknown',
+            "Session": SESSIONS[self.session],
+            "Type": TYPES[self.type],
+            "Component": self.component,
+            "URL": self.url,
+            "Unit": self.unit
+        }
+
+    def __reduce__(self):
+        # Codes are only meaningful in this process; pickle (--jobs workers) by name
+        return (PaperRecord, (self.subject, self.year, SESSIONS[self.session], TYPES[self.type],
+                              self.component, self.url, self.category, self.unit, self.title))
+
+    def __repr__(self):
+        return (f"PaperRecord({self.subject!r}, {self.year!r}, {self.session_name!r}, "
+                f"{self.type_name!r}, {self.component!r}, {self.url!r})")
+
+def from_item(item):
+    keys = SHORT_KEYS
+    for marker, layout in ITEM_KEYS:
+        if marker in item:
+            keys = layout
+            break
+    return PaperRecord(*[item.get(key) for key in keys])
+
+def load_records(filepath):
+    # A flat JSON array of items as PaperRecords; each item dict is released as
+    # soon as it is converted, so the dicts never all exist at once
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f, object_hook=from_item)
+
+def write_json_array(items, f, indent=2, batch_size=1000):
+    # Streams items as a JSON array, byte-identical to json.dump(list(items), f, indent=indent),
+    # encoding batch_size items per json.dumps call
+    items = iter(items)
+    separator = ', ' if indent is None else ',\n'
+    first = True
+    f.write('[')
+    while True:
+        batch = list(itertools.islice(items, batch_size))
+        if not batch:
+            break
+        # Each batch encodes as "[" + body + "]", or "[\n" + body + "\n]" when indented
+        text = json.dumps(batch, indent=indent)
+        body = text[1:-1] if indent is None else text[1:-2]
+        f.write(body if first else separator + body.lstrip('\n'))
+        first = False
+    f.write(']' if first or indent is None else '\n]')
+
+def write_records(records, f, indent=2):
+    write_json_array((record.to_item() for record in records), f, indent)
@@ -0,0 +1,78 @@
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# What a visitor downloads is the gzip- or brotli-encoded shard, not the raw
+# JSON, so sizes are budgeted on the compressed bytes and every output can get
+# maximum-level .gz and .br sidecars for hosts that serve precompressed files.
+# brotli is optional (pip install brotli); without it only .gz is written.
+
+def gzip_bytes(data):
+    # mtime=0 keeps the output byte-identical across builds
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def brotli_bytes(data):
+    if brotli is None:
+        return None
+    return brotli.compress(data, quality=11)
+
+def compressed_size(data):
+    # Size the chunker budgets against
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return len(gzip_bytes(data))
+
+def sidecar_paths(path):
+    return [path + '.gz', path + '.br']
+
+def remove_sidecars(path):
+    for sidecar in sidecar_paths(path):
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
+
+def write_sidecars(path):
+    # Returns (paths written, report row)
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    written = []
+    row = {'file': path, 'raw': len(data), 'gzip': None, 'brotli': None}
+    for sidecar, compressed in zip(sidecar_paths(path), [gzip_bytes(data), brotli_bytes(data)]):
+        if compressed is None:
+            continue
+        with open(sidecar, 'wb') as f:
+            f.write(compressed)
+        written.append(sidecar)
+        row['gzip' if sidecar.endswith('.gz') else 'brotli'] = len(compressed)
+    return written, row
+
+def print_report(rows):
+    def kb(n):
+        return '-' if n is None else f"{n / 1024:.1f}"
+
+    width = max([len(row['file']) for row in rows] + [4])
+    print(f"{'File':<{width}}  {'Raw KB':>8}  {'Gzip KB':>8}  {'Brotli KB':>9}")
+    for row in rows:
+        print(f"{row['file']:<{width}}  {kb(row['raw']):>8}  {kb(row['gzip']):>8}  {kb(row['brotli']):>9}")
+    if len(rows) > 1:
+        total = {key: sum(row[key] or 0 for row in rows) for key in ('raw', 'gzip', 'brotli')}
+        if brotli is None:
+            total['brotli'] = None
+        print(f"{'Total':<{width}}  {kb(total['raw']):>8}  {kb(total['gzip']):>8}  {kb(total['brotli']):>9}")
+    if brotli is None:
+        print("brotli not installed; skipped .br sidecars")
+
+def precompress_outputs(paths):
+    # Post-output step: writes sidecars for every file of a level and prints its table
+    written = []
+    rows = []
+    for path in paths:
+        sidecars, row = write_sidecars(path)
+        written.extend(sidecars)
+        rows.append(row)
+    print_report(rows)
+    return written
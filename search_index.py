@@ -0,0 +1,158 @@
+import json
+import os
+import re
+from bisect import bisect_left
+
+# Prebuilt inverted search index per level (optimize_data.py --emit search).
+#
+# Records are numbered in the order subjects appear in the index's "subjects"
+# list, so record id = offset of its subject + its position within the subject
+# (chunking reorders subjects, the index does not depend on it). Each record is
+# broken into lowercase tokens: subject name words and code, full year, session
+# words plus the m/s/w+yy code, type, and component with its p<paper> and
+# v<variant> forms; IAL adds the unit code, subject name and title words. The
+# index stores the sorted token list and, per token, its posting list as runs:
+#
+#   {"version": 1, "level": ..., "subjects": [...], "counts": [...],
+#    "tokens": ["0452", "accounting", ...], "postings": [[gap, length, ...], ...]}
+#
+# where each run starts `gap` ids after the end of the previous one. A query
+# term matches every token containing it, as the client's substring scan did
+# ("ph11" finds WPH11, "24" finds 2024): the tokens' suffixes are sorted once
+# at load, and the tokens containing a term are those with a suffix starting
+# with it, one binary search away (as in frame_search.py). Search is that per
+# term plus a posting-list intersection. A query term with other characters
+# ("9-1") is looked up by its words and then checked whole against the
+# record's fields. src/searchIndex.js mirrors search().
+
+VERSION = 1
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+WORD_RE = re.compile(r'^[a-z0-9]+$')
+
+# Display names, as in SESSION_REV_MAP in src/App.jsx
+SESSION_NAMES = {
+    1: 'January', 2: 'February', 3: 'Feb/March', 4: 'April', 5: 'May', 6: 'May/June',
+    7: 'July', 8: 'August', 9: 'September', 10: 'October', 11: 'Oct/Nov', 12: 'December'
+}
+SESSION_LETTERS = {3: 'm', 6: 's', 11: 'w'}
+
+IAL_SUBJECTS_FILE = 'src/subjectMapping.js'
+
+def load_ial_subjects(path=IAL_SUBJECTS_FILE):
+    # The client's unit-prefix -> subject name table is the single source of truth
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return dict(re.findall(r"'(\w+)':\s*'([^']*)'", f.read()))
+
+def words(text):
+    return TOKEN_RE.findall(str(text).lower()) if text is not None else []
+
+def component_tokens(c):
+    if c is None:
+        return []
+    text = str(int(c)) if isinstance(c, float) and c.is_integer() else str(c)
+    tokens = words(text)
+    if text.isdigit() and len(text) <= 2:
+        tokens.append('p' + text[0])
+        if len(text) == 2:
+            tokens.append('v' + text[1])
+    return tokens
+
+def record_tokens(subject, record, level_name, ial_subjects):
+    y, s, t, c = record[:4]
+    year = 2000 + y if y < 50 else 1900 + y
+    tokens = words(subject) + [str(year)] + words(SESSION_NAMES.get(s)) + words(t)
+    if s in SESSION_LETTERS:
+        tokens.append(f"{SESSION_LETTERS[s]}{y:02d}")
+    if level_name == 'IAL':
+        # IAL keeps the unit title where CIE has the component
+        tokens += words(ial_subjects.get((subject or '')[:3], '')) + words(c)
+    else:
+        tokens += component_tokens(c)
+    return tokens
+
+def encode_runs(ids):
+    # Sorted ids -> [gap, length, gap, length, ...]
+    runs = []
+    end = 0
+    for i in ids:
+        if runs and i == end:
+            runs[-1] += 1
+        else:
+            runs += [i - end, 1]
+        end = i + 1
+    return runs
+
+def decode_runs(runs):
+    ids = []
+    end = 0
+    for k in range(0, len(runs), 2):
+        start = end + runs[k]
+        end = start + runs[k + 1]
+        ids.extend(range(start, end))
+    return ids
+
+def build_index(grouped, level_name):
+    ial_subjects = load_ial_subjects() if level_name == 'IAL' else {}
+    postings = {}
+    record_id = 0
+    for subject, records in grouped.items():
+        for record in records:
+            for token in set(record_tokens(subject, record, level_name, ial_subjects)):
+                postings.setdefault(token, []).append(record_id)
+            record_id += 1
+
+    tokens = sorted(postings)
+    return {
+        'version': VERSION,
+        'level': level_name,
+        'subjects': list(grouped),
+        'counts': [len(records) for records in grouped.values()],
+        'tokens': tokens,
+        'postings': [encode_runs(postings[token]) for token in tokens],
+    }
+
+def suffix_table(tokens):
+    # Every suffix of every token, sorted, with the position of its token
+    return sorted((token[i:], t) for t, token in enumerate(tokens) for i in range(len(token)))
+
+def search(index, query, parts_of=None):
+    # Reference lookup: ids of records where every query word is inside some
+    # token. A term with other characters ("9-1") is looked up by its words and,
+    # given parts_of(id) -> the record's searchable fields, must also appear whole
+    # in one of them, as in the client's scan
+    terms = str(query).lower().split()
+    if not terms:
+        return None
+    suffixes = suffix_table(index['tokens'])
+    result = set(range(sum(index['counts'])))
+    for term in words(query):
+        owners = set()
+        i = bisect_left(suffixes, (term,))
+        while i < len(suffixes) and suffixes[i][0].startswith(term):
+            owners.add(suffixes[i][1])
+            i += 1
+        matched = set()
+        for t in owners:
+            matched.update(decode_runs(index['postings'][t]))
+        result &= matched
+        if not result:
+            break
+    phrases = [term for term in terms if not WORD_RE.match(term)]
+    if phrases and parts_of is not None:
+        result = {
+            i for i in result
+            if all(any(term in str(part).lower() for part in parts_of(i) if part) for term in phrases)
+        }
+    return sorted(result)
+
+def save_search_index(grouped, filepath, level_name):
+    # Writes <base>.search.json next to the JSON output and returns the paths written
+    base, _ = os.path.splitext(filepath)
+    index_path = base + '.search.json'
+    json_str = json.dumps(build_index(grouped, level_name), separators=(',', ':'))
+    with open(index_path, 'w', encoding='utf-8') as f:
+        f.write(json_str)
+    print(f"Saved search index {index_path} ({len(json_str) / 1024:.0f} KB raw)")
+    return [index_path]
@@ -1,44 +1,49 @@
-import json
 import os
 
-def split_cie_data():
-    input_file = 'public/cie_data.json'
-    
+import build_report
+import paper_record
+
+def split_cie_data(input_file='public/cie_data.json', output_dir='public'):
     if not os.path.exists(input_file):
         print(f"File {input_file} not found.")
         return
 
     print(f"Reading {input_file}...")
-    with open(input_file, 'r') as f:
-        data = json.load(f)
+    data = paper_record.load_records(input_file)
 
     print(f"Total records: {len(data)}")
 
     # Group by Category
     grouped_data = {}
     
-    for item in data:
-        category = item.get('Category')
+    for record in data:
+        category = record.category
         if not category:
-            print(f"Warning: Item without category: {item}")
+            print(f"Warning: Item without category: {record}")
             continue
             
         if category not in grouped_data:
             grouped_data[category] = []
         
-        grouped_data[category].append(item)
+        grouped_data[category].append(record)
 
     # Save to separate files
     for category, items in grouped_data.items():
         # Create a safe filename
         safe_filename = category.replace(' ', '_').replace('&', 'and')
-        output_file = f'public/cie_{safe_filename}.json'
+        output_file = os.path.join(output_dir, f'cie_{safe_filename}.json')
         
         print(f"Saving {len(items)} records to {output_file}...")
         with open(output_file, 'w') as f:
-            json.dump(items, f)
+            paper_record.write_records(items, f, indent=None)
 
     print("Done.")
 
 if __name__ == "__main__":
-    split_cie_data()
+    with build_report.stage('split_cie', inputs=['public/cie_data.json']) as entry:
+        split_cie_data()
+        entry['outputs'].extend(
+            os.path.join('public', name) for name in os.listdir('public')
+            if name.startswith('cie_') and name != 'cie_data.json'
+        )
+    build_report.finish()
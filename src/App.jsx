@@ -2,6 +2,11 @@ import { useState, useEffect, useMemo, useDeferredValue, useRef } from 'react'
 import { Search, FileText, FileCheck, Download, Moon, BookOpen, GraduationCap, Loader2, ExternalLink, Home, Shield, Scale, Library, ChevronDown, ChevronRight, ChevronsDown, ChevronsUp } from 'lucide-react'
 import './App.css'
 import { getIALSubjectName } from './subjectMapping'
+import { getSubjectCode, recordFilename } from './cieFilenames'
+import { buildPrefixPaths, recordUrl } from './ialUrls'
+import { assetUrl, hasAsset } from './assetManifest'
+import { prepareSearchIndex, searchIndex, itemsById } from './searchIndex'
+import { preparePaperGroups, buildPaperGroups } from './paperGroups'
 
 const MONTHS = { 'January': 1, 'February': 2, 'March': 3, 'May': 5, 'June': 6, 'October': 10, 'November': 11 }
 const SESSION_REV_MAP = { 1: 'January', 2: 'February', 3: 'Feb/March', 4: 'April', 5: 'May', 6: 'May/June', 7: 'July', 8: 'August', 9: 'September', 10: 'October', 11: 'Oct/Nov', 12: 'December' }
@@ -9,20 +14,30 @@ const SESSION_REV_MAP = { 1: 'January', 2: 'February', 3: 'Feb/March', 4: 'April
 const BASE_URL = import.meta.env.BASE_URL.endsWith('/') ? import.meta.env.BASE_URL.slice(0, -1) : import.meta.env.BASE_URL
 
 const DATA_CONFIG = {
-  'IGCSE': { file: 'igcse.json', split: true },
-  'O Level': { file: 'olevel.json', split: false },
-  'AS and A Level': { file: 'alevel.json', split: true }
+  'IGCSE': { file: 'igcse.json' },
+  'O Level': { file: 'olevel.json' },
+  'AS and A Level': { file: 'alevel.json' }
 }
 
 // Helper to decode optimized JSON keys
 const decodeData = (data, level) => {
+  // IAL shards wrap the records with a shared URL prefix dictionary
+  let prefixPaths = []
+  if (data && data.prefixes) {
+    prefixPaths = buildPrefixPaths(data.prefixes)
+    data = data.data
+  }
+
   // Handle new Subject-grouped format
   if (!Array.isArray(data)) {
     const flattened = []
     for (const [subject, records] of Object.entries(data)) {
-      for (const record of records) {
-        // [y, s, t, c, u]
-        const [y, s, t, c, u] = record
+      const subjectCode = level === 'IAL' ? null : getSubjectCode(subject)
+      records.forEach((record, position) => {
+        // [y, s, t, c, u], or [y, s, t, c] when the CIE filename follows the standard template,
+        // or [y, s, t, c, leaf, prefixId] for IAL URLs under a shared directory
+        const [y, s, t, c] = record
+        const u = level === 'IAL' ? recordUrl(prefixPaths, record) : recordFilename(subjectCode, record)
         
         // Reconstruct Year
         const year = y < 50 ? 2000 + y : 1900 + y // Assumption: 15 -> 2015, 99 -> 1999
@@ -69,7 +84,8 @@ const decodeData = (data, level) => {
           URL: fullUrl,
           Subject: subject,
           Unit: c, // Fallback
-          Category: level
+          Category: level,
+          Position: position // Index within the subject, used by the search index
         }
         
         if (level === 'IAL') {
@@ -79,7 +95,7 @@ const decodeData = (data, level) => {
         }
         
         flattened.push(item)
-      }
+      })
     }
     return flattened
   }
@@ -99,6 +115,48 @@ const decodeData = (data, level) => {
   }))
 }
 
+const isJsonResponse = (res) => {
+  const contentType = res.headers.get("content-type")
+  return res.ok && contentType && contentType.includes("application/json")
+}
+
+// A level is either one file or, once it outgrows the size budget, chunks _1.._n with
+// n at most MAX_CHUNKS (optimize_data.MAX_CHUNKS caps the split to match)
+const MAX_CHUNKS = 5
+
+const fetchLevelData = async (file, level) => {
+  const res = await fetch(await assetUrl(file))
+  if (isJsonResponse(res)) return decodeData(await res.json(), level)
+
+  let combinedData = []
+  const baseName = file.replace('.json', '')
+  for (let i = 1; i <= MAX_CHUNKS; i++) {
+    try {
+      const chunkRes = await fetch(await assetUrl(`${baseName}_${i}.json`))
+      if (!isJsonResponse(chunkRes)) break // Stop if chunk not found
+      combinedData = combinedData.concat(decodeData(await chunkRes.json(), level))
+    } catch (e) { break }
+  }
+  return combinedData
+}
+
+// Optional prebuilt file next to a level (<level>.search.json), or null when the level
+// was built without it; a deployed asset manifest that does not list it saves the request
+const fetchLevelExtra = async (file, suffix, prepare) => {
+  const name = file.replace('.json', `.${suffix}.json`)
+  try {
+    if (!(await hasAsset(name))) return null
+    const res = await fetch(await assetUrl(name))
+    return isJsonResponse(res) ? prepare(await res.json()) : null
+  } catch (e) { return null }
+}
+
+const levelFile = (level) => {
+  if (level === 'IAL') return 'ial.json'
+  const config = DATA_CONFIG[level]
+  return config ? config.file : `cie_${level.replace(/ /g, '_').replace(/&/g, 'and')}.json`
+}
+
 const getCleanTitle = (item) => {
   if (item.Title) return item.Title
   if (!item.URL) return 'Resource'
@@ -147,10 +205,13 @@ function App() {
   const deferredSearchTerm = useDeferredValue(searchTerm)
   const [ialData, setIalData] = useState([])
   const [cieCache, setCieCache] = useState({})
+  const [searchIndexes, setSearchIndexes] = useState({})
   const [loading, setLoading] = useState(false)
   const [sortOrder, setSortOrder] = useState('newest')
   const [visibleCount, setVisibleCount] = useState(50)
   const [expandAll, setExpandAll] = useState(null)
+
+  const searchIndexRequests = useRef(new Set())
   
   // URL Routing Logic (Back/Forward support)
   useEffect(() => {
@@ -198,29 +259,7 @@ function App() {
            try {
              console.log(`Preloading ${key}...`)
              
-             let combinedData = []
-             
-             if (!config.split) {
-                 // Try main file
-                 const res = await fetch(`${import.meta.env.BASE_URL}${config.file}`)
-                 const contentType = res.headers.get("content-type")
-                 if (res.ok && contentType && contentType.includes("application/json")) {
-                    const rawData = await res.json()
-                    combinedData = decodeData(rawData, key)
-                 }
-             } else {
-                // Try chunks
-                const baseName = config.file.replace('.json', '')
-                for (let i = 1; i <= 5; i++) {
-                   try {
-                     const chunkRes = await fetch(`${import.meta.env.BASE_URL}${baseName}_${i}.json`)
-                     const chunkType = chunkRes.headers.get("content-type")
-                     if (!chunkRes.ok || !chunkType || !chunkType.includes("application/json")) break
-                     const chunkRaw = await chunkRes.json()
-                     combinedData = combinedData.concat(decodeData(chunkRaw, key))
-                   } catch (e) { break }
-                }
-             }
+             const combinedData = await fetchLevelData(config.file, key)
 
              if (combinedData.length > 0) {
                  setCieCache(prev => {
@@ -250,7 +289,7 @@ function App() {
       setLoading(true)
       try {
         if (activeTab === 'ial' && ialData.length === 0) {
-          const url = `${import.meta.env.BASE_URL}ial.json`
+          const url = await assetUrl('ial.json')
           try {
             const res = await fetch(url)
             if (!res.ok) throw new Error(`HTTP error! status: ${res.status}`)
@@ -264,36 +303,7 @@ function App() {
             return
           }
           
-          const config = DATA_CONFIG[cieLevel]
-          const filename = config ? config.file : `cie_${cieLevel.replace(/ /g, '_').replace(/&/g, 'and')}.json`
-          const isSplit = config ? config.split : false
-          
-          let combinedData = []
-          
-          if (!isSplit) {
-              // Try loading main file
-              try {
-                const res = await fetch(`${import.meta.env.BASE_URL}${filename}`)
-                const contentType = res.headers.get("content-type")
-                if (res.ok && contentType && contentType.includes("application/json")) {
-                   const rawData = await res.json()
-                   combinedData = decodeData(rawData, cieLevel)
-                }
-              } catch (e) { throw e }
-          } else {
-               // Try chunks 1..5
-               const baseName = filename.replace('.json', '')
-               for (let i = 1; i <= 5; i++) {
-                 try {
-                   const chunkRes = await fetch(`${import.meta.env.BASE_URL}${baseName}_${i}.json`)
-                   const chunkType = chunkRes.headers.get("content-type")
-                   if (!chunkRes.ok || !chunkType || !chunkType.includes("application/json")) break // Stop if chunk not found
-                   const chunkRaw = await chunkRes.json()
-                   const chunkData = decodeData(chunkRaw, cieLevel)
-                   combinedData = combinedData.concat(chunkData)
-                 } catch (e) { break }
-               }
-          }
+          const combinedData = await fetchLevelData(levelFile(cieLevel), cieLevel)
             
           if (combinedData.length > 0 && !ignore) {
               setCieCache(prev => ({ ...prev, [cieLevel]: combinedData }))
@@ -323,12 +333,28 @@ function App() {
     return []
   }, [activeTab, ialData, cieCache, cieLevel])
 
+  const dataKey = activeTab === 'ial' ? 'IAL' : cieLevel
+
+  // The active level's prebuilt search index, requested once per level; preloading skips it
+  useEffect(() => {
+    if (view !== 'app' || !dataKey || searchIndexRequests.current.has(dataKey)) return
+    searchIndexRequests.current.add(dataKey)
+    fetchLevelExtra(levelFile(dataKey), 'search', prepareSearchIndex).then(index => {
+      if (index) setSearchIndexes(prev => ({ ...prev, [dataKey]: index }))
+    })
+  }, [view, dataKey])
+
+  // Records by id for the prebuilt search index, when the level has one
+  const searchTree = searchIndexes[dataKey]
+  const searchItems = useMemo(() => {
+    if (!searchTree || searchTree.total !== currentData.length) return null
+    return itemsById(searchTree, currentData)
+  }, [searchTree, currentData])
+
   const filteredData = useMemo(() => {
     if (!deferredSearchTerm) return currentData
-    
-    const lowerTerms = deferredSearchTerm.toLowerCase().split(/\s+/).filter(t => t.length > 0)
-    
-    return currentData.filter(item => {
+
+    const searchParts = (item) => {
       const parts = [
         item.Subject,
         item.Year,
@@ -342,80 +368,36 @@ function App() {
       if (activeTab === 'ial') {
         parts.push(getIALSubjectName(item.Unit_Code))
       }
+      return parts
+    }
+
+    // Lookups in the prebuilt index resolve straight to the matching records
+    if (searchItems) {
+      const ids = searchIndex(searchTree, deferredSearchTerm, id => searchParts(searchItems[id]))
+      if (ids) return Array.from(ids, id => searchItems[id])
+    }
+    
+    const lowerTerms = deferredSearchTerm.toLowerCase().split(/\s+/).filter(t => t.length > 0)
+    
+    return currentData.filter(item => {
+      const parts = searchParts(item)
       
       // Optimization: Check if any term matches any part without joining
       return lowerTerms.every(term => 
         parts.some(part => part && String(part).toLowerCase().includes(term))
       )
     })
-  }, [deferredSearchTerm, currentData, activeTab])
+  }, [deferredSearchTerm, currentData, activeTab, searchTree, searchItems])
+
+  // The paper view's grouping of the whole level, built once per level (see paperGroups.js)
+  const isPaperView = viewMode === 'paper'
+  const paperTree = useMemo(() => {
+    return isPaperView ? preparePaperGroups(currentData, activeTab === 'ial') : null
+  }, [isPaperView, currentData, activeTab])
 
   const groupedData = useMemo(() => {
     if (viewMode === 'paper') {
-      // Group by Subject -> Unit/Component -> Sessions
-      const groups = {}
-      
-      filteredData.forEach(item => {
-        let subject = item.Subject
-        let unit = item.Unit || item.Component || item.Unit_Code || 'General'
-        
-        if (activeTab === 'ial') {
-           subject = getIALSubjectName(item.Unit_Code) || 'Unknown'
-           unit = item.Unit_Code
-        }
-        
-        const key = `${subject}|${unit}`
-        
-        if (!groups[key]) {
-          groups[key] = {
-            id: key,
-            subject,
-            unit,
-            sessions: {} // Map of "Year|Session" -> { qp, ms, er, others }
-          }
-        }
-        
-        const sessionKey = `${item.Year}|${item.Session}`
-        if (!groups[key].sessions[sessionKey]) {
-          groups[key].sessions[sessionKey] = {
-            year: item.Year,
-            session: item.Session,
-            qp: null, ms: null, er: null, gt: null, others: []
-          }
-        }
-        
-        const s = groups[key].sessions[sessionKey]
-        if (item.Type === 'qp') s.qp = item
-        else if (item.Type === 'ms') s.ms = item
-        else if (item.Type === 'er') s.er = item
-        else if (item.Type === 'gt') s.gt = item
-        else s.others.push(item)
-      })
-      
-      // Convert sessions map to sorted array
-      Object.values(groups).forEach(group => {
-        group.sortedSessions = Object.values(group.sessions).sort((a, b) => {
-           if (a.year !== b.year) return b.year - a.year
-           return (MONTHS[b.session] || 0) - (MONTHS[a.session] || 0)
-        })
-        // Check if group has recent papers (2023, 2024, or 2025)
-        group.isOldSyllabus = !group.sortedSessions.some(s => s.year == 2023 || s.year == 2024 || s.year == 2025)
-      })
-      
-      // Sort groups by Subject then Unit
-      const sortedGroups = Object.values(groups).sort((a, b) => {
-        // Put old syllabus items at the bottom
-        if (a.isOldSyllabus !== b.isOldSyllabus) return a.isOldSyllabus ? 1 : -1
-
-        if (sortOrder === 'az') return a.subject.localeCompare(b.subject)
-        if (sortOrder === 'za') return b.subject.localeCompare(a.subject)
-        
-        // Default to Subject A-Z
-        if (a.subject !== b.subject) return a.subject.localeCompare(b.subject)
-        return String(a.unit).localeCompare(String(b.unit), undefined, { numeric: true })
-      })
-      
-      return sortedGroups
+      return buildPaperGroups(paperTree, filteredData, sortOrder)
     }
 
     if (activeTab === 'ial') {
@@ -536,7 +518,7 @@ function App() {
         return sessionB - sessionA
       })
     }
-  }, [filteredData, activeTab, viewMode, sortOrder])
+  }, [filteredData, paperTree, activeTab, viewMode, sortOrder])
 
   if (loading) {
     return (
@@ -0,0 +1,30 @@
+// Resolves data file names through public/assets.json, written by build.py --hashed
+// (see asset_hashes.py). Hashed copies never change, so only the manifest is revalidated;
+// without it every name resolves to itself.
+
+let assetsPromise = null
+
+const loadAssets = () => {
+  if (!assetsPromise) {
+    assetsPromise = fetch(`${import.meta.env.BASE_URL}assets.json`, { cache: 'no-cache' })
+      .then(res => {
+        const contentType = res.headers.get("content-type")
+        return res.ok && contentType && contentType.includes("application/json") ? res.json() : {}
+      })
+      .then(manifest => manifest.assets || {})
+      .catch(() => ({}))
+  }
+  return assetsPromise
+}
+
+export const assetUrl = async (name) => {
+  const assets = await loadAssets()
+  return `${import.meta.env.BASE_URL}${assets[name] || name}`
+}
+
+// False only when a manifest is deployed and does not list `name`, so optional files the
+// build did not write are not requested
+export const hasAsset = async (name) => {
+  const assets = await loadAssets()
+  return Object.keys(assets).length === 0 || name in assets
+}
@@ -0,0 +1,23 @@
+// Client mirror of cie_filenames.py: CIE records whose filename follows
+// <code>_<m|s|w><yy>_<type>[_<comp>].pdf are shipped as [y, s, t, c] and the
+// filename is rebuilt here. Keep the two implementations in step.
+
+const SESSION_LETTERS = { 3: 'm', 6: 's', 11: 'w' }
+
+export const getSubjectCode = (subject) => {
+  const match = /\((\d{4})\)$/.exec(subject || '')
+  return match ? match[1] : null
+}
+
+export const cieFilename = (code, y, s, t, c) => {
+  const letter = SESSION_LETTERS[s]
+  if (!code || !letter || !t) return null
+  let name = `${code}_${letter}${String(y).padStart(2, '0')}_${t}`
+  if (c !== null && c !== undefined) name += `_${c}`
+  return `${name}.pdf`
+}
+
+// Returns the record's filename, whether stored or derived
+export const recordFilename = (code, record) => (
+  record.length > 4 ? record[4] : cieFilename(code, record[0], record[1], record[2], record[3])
+)
@@ -0,0 +1,16 @@
+// Client mirror of ial_urls.py: ial.json ships { prefixes, data } where
+// prefixes is a trie of [parent, segment] entries and records are
+// [y, s, t, c, leaf, prefixId]. Keep the two implementations in step.
+
+export const buildPrefixPaths = (prefixes) => {
+  const paths = []
+  for (const [parent, segment] of prefixes) {
+    paths.push(parent < 0 ? segment : `${paths[parent]}/${segment}`)
+  }
+  return paths
+}
+
+// Returns the record's full URL, whether stored whole or as leaf + prefix id
+export const recordUrl = (paths, record) => (
+  record.length > 5 ? `${paths[record[5]]}/${record[4]}` : record[4]
+)
@@ -0,0 +1,117 @@
+// "By Paper" view grouping. A level's records are grouped once, when the view first needs them:
+// every record gets the number of its session row, each row the number of its subject/unit group,
+// and subjects and units get integer ranks in localeCompare order. A filter change then only
+// walks the filtered records and sorts the surviving groups by those ranks, with the same result
+// as grouping the filtered records from scratch: first-seen order breaks ties, the last matching
+// qp/ms/er/gt of a session fills its slot, and the old-syllabus flag covers the matching sessions.
+
+import { getIALSubjectName } from './subjectMapping'
+
+const MONTHS = { 'January': 1, 'February': 2, 'March': 3, 'May': 5, 'June': 6, 'October': 10, 'November': 11 }
+
+// value -> rank in `compare` order; values that compare equal share a rank
+const rankBy = (values, compare) => {
+  const sorted = [...new Set(values)].sort(compare)
+  const ranks = new Map()
+  let rank = 0
+  sorted.forEach((value, i) => {
+    if (i > 0 && compare(sorted[i - 1], value) !== 0) rank = i
+    ranks.set(value, rank)
+  })
+  return ranks
+}
+
+// A record's (subject, unit) in the paper view
+const groupKey = (item, isIAL) => {
+  if (isIAL) return [getIALSubjectName(item.Unit_Code) || 'Unknown', item.Unit_Code]
+  return [item.Subject, item.Unit || item.Component || item.Unit_Code || 'General']
+}
+
+export const preparePaperGroups = (items, isIAL) => {
+  const indexOf = new Map()
+  const sessionOf = new Int32Array(items.length)
+  const groups = []
+  const sessions = []
+  const groupIds = new Map()
+  const sessionIds = new Map()
+
+  items.forEach((item, i) => {
+    const [subject, unit] = groupKey(item, isIAL)
+    const key = `${subject}|${unit}`
+    let group = groupIds.get(key)
+    if (group === undefined) {
+      group = groups.length
+      groupIds.set(key, group)
+      groups.push({ id: key, subject, unit })
+    }
+    const sessionKey = `${group}|${item.Year}|${item.Session}`
+    let session = sessionIds.get(sessionKey)
+    if (session === undefined) {
+      session = sessions.length
+      sessionIds.set(sessionKey, session)
+      sessions.push({ group, year: item.Year, session: item.Session })
+    }
+    indexOf.set(item, i)
+    sessionOf[i] = session
+  })
+
+  const subjectRanks = rankBy(groups.map(g => g.subject), (a, b) => a.localeCompare(b))
+  const unitRanks = rankBy(groups.map(g => String(g.unit)), (a, b) => a.localeCompare(b, undefined, { numeric: true }))
+  for (const g of groups) {
+    g.subjectRank = subjectRanks.get(g.subject)
+    g.unitRank = unitRanks.get(String(g.unit))
+  }
+  return { isIAL, indexOf, sessionOf, groups, sessions }
+}
+
+// The groups the paper view renders for `filtered`, a subset of the prepared items in any order
+export const buildPaperGroups = (tree, filtered, sortOrder) => {
+  const rows = new Array(tree.sessions.length)
+  const found = new Array(tree.groups.length)
+  const order = []
+
+  for (const item of filtered) {
+    const s = tree.sessionOf[tree.indexOf.get(item)]
+    let row = rows[s]
+    if (!row) {
+      const { group, year, session } = tree.sessions[s]
+      row = rows[s] = { year, session, qp: null, ms: null, er: null, gt: null, others: [] }
+      if (!found[group]) {
+        // The unit as its first matching record has it (12 or '12' are one group)
+        const [subject, unit] = groupKey(item, tree.isIAL)
+        found[group] = { id: tree.groups[group].id, subject, unit, sortedSessions: [], group }
+        order.push(found[group])
+      }
+      found[group].sortedSessions.push(row)
+    }
+    if (item.Type === 'qp') row.qp = item
+    else if (item.Type === 'ms') row.ms = item
+    else if (item.Type === 'er') row.er = item
+    else if (item.Type === 'gt') row.gt = item
+    else row.others.push(item)
+  }
+
+  for (const group of order) {
+    group.sortedSessions.sort((a, b) => {
+      if (a.year !== b.year) return b.year - a.year
+      return (MONTHS[b.session] || 0) - (MONTHS[a.session] || 0)
+    })
+    // Check if group has recent papers (2023, 2024, or 2025)
+    group.isOldSyllabus = !group.sortedSessions.some(s => s.year == 2023 || s.year == 2024 || s.year == 2025)
+  }
+
+  const ranks = tree.groups
+  return order.sort((a, b) => {
+    // Put old syllabus items at the bottom
+    if (a.isOldSyllabus !== b.isOldSyllabus) return a.isOldSyllabus ? 1 : -1
+
+    const ra = ranks[a.group]
+    const rb = ranks[b.group]
+    if (sortOrder === 'az') return ra.subjectRank - rb.subjectRank
+    if (sortOrder === 'za') return rb.subjectRank - ra.subjectRank
+
+    // Default to Subject A-Z
+    if (a.subject !== b.subject) return ra.subjectRank - rb.subjectRank
+    return ra.unitRank - rb.unitRank
+  })
+}
@@ -0,0 +1,150 @@
+// Client side of the prebuilt search index written by search_index.py (optimize_data.py --emit search)
+// A query term matches every token containing it; terms are intersected. A term with other
+// characters ("9-1", "a/s") is looked up by its words, then must appear whole in the record's text.
+
+const TOKEN_RE = /[a-z0-9]+/g
+const WORD_RE = /^[a-z0-9]+$/
+const EMPTY = new Uint32Array(0)
+// A term matching more than 1/DENSE_FRACTION of the records is merged with a flag per record
+const DENSE_FRACTION = 8
+
+const compareSuffixes = (a, b) => (a[0] < b[0] ? -1 : a[0] > b[0] ? 1 : 0)
+
+export const prepareSearchIndex = (index) => {
+  // Record ids are subject offset + position within the subject
+  const offsets = {}
+  let total = 0
+  index.subjects.forEach((subject, i) => {
+    offsets[subject] = total
+    total += index.counts[i]
+  })
+
+  // Every suffix of every token, sorted, with owners[j] the token of suffixes[j]: the tokens
+  // containing a term are those with a suffix starting with it
+  const pairs = []
+  index.tokens.forEach((token, t) => {
+    for (let k = 0; k < token.length; k++) pairs.push([token.slice(k), t])
+  })
+  pairs.sort(compareSuffixes)
+  const suffixes = pairs.map(pair => pair[0])
+  const owners = Uint32Array.from(pairs, pair => pair[1])
+
+  return { ...index, offsets, total, suffixes, owners, decoded: new Map() }
+}
+
+// Posting lists are stored as [gap, length, ...] runs and decoded on first use
+const postingIds = (index, tokenIdx) => {
+  let ids = index.decoded.get(tokenIdx)
+  if (!ids) {
+    const runs = index.postings[tokenIdx]
+    let size = 0
+    for (let k = 1; k < runs.length; k += 2) size += runs[k]
+    ids = new Uint32Array(size)
+    let end = 0
+    let n = 0
+    for (let k = 0; k < runs.length; k += 2) {
+      const start = end + runs[k]
+      end = start + runs[k + 1]
+      for (let id = start; id < end; id++) ids[n++] = id
+    }
+    index.decoded.set(tokenIdx, ids)
+  }
+  return ids
+}
+
+const lowerBound = (sorted, value, lo = 0) => {
+  let hi = sorted.length
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1
+    if (sorted[mid] < value) lo = mid + 1
+    else hi = mid
+  }
+  return lo
+}
+
+// Sorted ids of the records with a token containing `term`
+const termIds = (index, term) => {
+  const tokens = new Set()
+  for (let i = lowerBound(index.suffixes, term); i < index.suffixes.length && index.suffixes[i].startsWith(term); i++) {
+    tokens.add(index.owners[i])
+  }
+  if (tokens.size === 0) return EMPTY
+  const lists = Array.from(tokens, t => postingIds(index, t))
+  if (lists.length === 1) return lists[0]
+
+  let size = 0
+  for (const ids of lists) size += ids.length
+  if (size * DENSE_FRACTION > index.total) {
+    // A short term ("2") can match most of the level, which flags merge in linear time
+    const flags = new Uint8Array(index.total)
+    let count = 0
+    for (const ids of lists) {
+      for (const id of ids) {
+        count += 1 - flags[id]
+        flags[id] = 1
+      }
+    }
+    const merged = new Uint32Array(count)
+    let n = 0
+    for (let id = 0; n < count; id++) if (flags[id]) merged[n++] = id
+    return merged
+  }
+
+  const merged = new Uint32Array(size)
+  let n = 0
+  for (const ids of lists) {
+    merged.set(ids, n)
+    n += ids.length
+  }
+  merged.sort()
+  let m = 0
+  for (let k = 0; k < merged.length; k++) if (k === 0 || merged[k] !== merged[k - 1]) merged[m++] = merged[k]
+  return merged.subarray(0, m)
+}
+
+// Ids in both sorted lists; each id of the shorter one is a binary search into the rest of the longer
+const intersect = (small, large) => {
+  const found = new Uint32Array(small.length)
+  let n = 0
+  let lo = 0
+  for (const id of small) {
+    lo = lowerBound(large, id, lo)
+    if (lo === large.length) break
+    if (large[lo] === id) found[n++] = id
+  }
+  return found.subarray(0, n)
+}
+
+// Returns the sorted ids of the matching records, or null for an empty query. partsOf(id) gives
+// the record's searchable fields, as the client's scan reads them, for terms that are not one word
+export const searchIndex = (index, query, partsOf) => {
+  const terms = query.toLowerCase().split(/\s+/).filter(term => term.length > 0)
+  if (!terms.length) return null
+
+  const words = terms.flatMap(term => term.match(TOKEN_RE) || [])
+  let result
+  if (words.length) {
+    // Smallest first, so a selective query only touches its own records
+    const matches = words.map(term => termIds(index, term)).sort((a, b) => a.length - b.length)
+    result = matches[0]
+    for (let k = 1; k < matches.length && result.length; k++) result = intersect(result, matches[k])
+  } else {
+    // Punctuation only ("-"): every record is a candidate
+    result = new Uint32Array(index.total)
+    for (let id = 0; id < index.total; id++) result[id] = id
+  }
+
+  const phrases = terms.filter(term => !WORD_RE.test(term))
+  if (!phrases.length || !result.length) return result
+  return result.filter(id => {
+    const parts = partsOf(id)
+    return phrases.every(term => parts.some(part => part && String(part).toLowerCase().includes(term)))
+  })
+}
+
+// Items indexed by record id; built once per loaded level
+export const itemsById = (index, items) => {
+  const byId = new Array(index.total)
+  for (const item of items) byId[index.offsets[item.Subject] + item.Position] = item
+  return byId
+}
@@ -0,0 +1,103 @@
+import json
+import os
+import re
+
+import cie_filenames
+import ial_urls
+import precompress
+
+# Per-subject shards for lazy loading (optimize_data.py --emit subjects).
+#
+# Next to public/igcse.json this writes a public/igcse/ directory holding one
+# <slug>.json per subject, in the same shape as the level file (so decodeData
+# in src/App.jsx reads either), plus a manifest.json:
+#
+#   {"version": 1, "level": "IGCSE", "count": <records>,
+#    "subjects": [{"subject": ..., "shard": "accounting-0452.json",
+#                  "count": ..., "bytes": ..., "gzipBytes": ...}, ...]}
+#
+# Shard names are relative to the manifest. A page can render the subject list
+# from the manifest alone and fetch a subject's few KB only when it is opened.
+# IAL shards carry only the URL prefixes their own records use.
+
+VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+def shard_dir(filepath):
+    base, _ = os.path.splitext(filepath)
+    return base
+
+def subject_slug(subject):
+    # "Accounting (0452)" -> "accounting-0452"
+    slug = re.sub(r'[^a-z0-9]+', '-', subject.lower()).strip('-')
+    return slug or 'subject'
+
+def shard_names(subjects):
+    # Slugs can collide once punctuation is dropped; later subjects get a suffix
+    names = {}
+    used = set()
+    for subject in subjects:
+        slug = subject_slug(subject)
+        name = slug + '.json'
+        n = 2
+        while name in used:
+            name = f"{slug}-{n}.json"
+            n += 1
+        used.add(name)
+        names[subject] = name
+    return names
+
+def subject_json(subject, records, level_name):
+    # Same bytes optimize_data.assemble gives a one-subject file
+    if level_name == 'IAL':
+        prefixes, encoded = ial_urls.encode_grouped({subject: records})
+        data = {'prefixes': prefixes, 'data': encoded}
+    else:
+        data = {subject: cie_filenames.compact_records(subject, records)}
+    return json.dumps(data, separators=(',', ':'))
+
+def remove_stale_shards(directory, keep):
+    for name in os.listdir(directory):
+        if name.endswith('.json') and name != MANIFEST_NAME and name not in keep:
+            path = os.path.join(directory, name)
+            os.remove(path)
+            precompress.remove_sidecars(path)
+            print(f"Removed stale shard {path}")
+
+def save_subject_shards(grouped, filepath, level_name):
+    # Writes every subject's shard and the level manifest; returns their paths
+    directory = shard_dir(filepath)
+    os.makedirs(directory, exist_ok=True)
+    names = shard_names(grouped)
+
+    written = []
+    entries = []
+    for subject, records in grouped.items():
+        json_str = subject_json(subject, records, level_name)
+        path = os.path.join(directory, names[subject])
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json_str)
+        written.append(path)
+        entries.append({
+            'subject': subject,
+            'shard': names[subject],
+            'count': len(records),
+            'bytes': len(json_str.encode('utf-8')),
+            'gzipBytes': precompress.compressed_size(json_str),
+        })
+    remove_stale_shards(directory, set(names.values()))
+
+    manifest = {
+        'version': VERSION,
+        'level': level_name,
+        'count': sum(entry['count'] for entry in entries),
+        'subjects': entries,
+    }
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+    written.append(manifest_path)
+
+    largest = max((entry['gzipBytes'] for entry in entries), default=0)
+    print(f"Saved {len(entries)} subject shards to {directory}/ (largest {largest / 1024:.1f} KB gzip)")
+    return written
@@ -0,0 +1,141 @@
+import argparse
+import csv
+import json
+import os
+import re
+
+import cie_filenames
+import ial_source
+import optimize_data
+
+# Synthetic copies of the source archives at a multiple of today's size, for
+# benchmark.py.
+#
+# The real archive is the template: scale 1 reproduces today's CIE records (as
+# deployed in public/) and IAL rows (the CSV_DATA block), and scale k adds k - 1
+# clones of every subject under a new name and code, with the code rewritten in
+# each filename or URL. Subjects, sessions, types, components, filename
+# patterns and records per subject therefore keep their real distributions;
+# only the number of subjects grows.
+#
+#   <dir>/cie.csv        cie.csv / FULL_CIE_ARCHIVE.csv columns
+#   <dir>/ial.csv        Unit_Code,Title,Date,URL, as in main-ial.py
+
+CIE_COLUMNS = ['Category', 'Subject', 'Year', 'Extracted_Year', 'Extracted_Session', 'Extracted_Type',
+               'Extracted_Component', 'Extracted_UnitCode', 'Full_URL', 'Filename']
+IAL_COLUMNS = ['Unit_Code', 'Title', 'Date', 'URL']
+
+CIE_URL_PREFIX = 'https://papers.xtremepape.rs/CAIE/'
+# Inverse of convert_cie_csv.map_type and of the SESSION_MAP entries cie.csv uses
+TYPE_NAMES = {
+    'qp': 'Question Paper', 'ms': 'Mark Scheme', 'er': 'Examiner Report', 'gt': 'Grade Thresholds',
+    'insert': 'Insert', 'ci': 'Confidential Instructions', 'other': 'Other'
+}
+SESSION_NAMES = {1: 'January', 3: 'Feb/March', 6: 'May/June', 10: 'October', 11: 'Oct/Nov'}
+
+UNIT_CODE_RE = re.compile(r'^([A-Za-z]+)(\d+)$')
+
+def level_files(path):
+    # A level is either one file or chunks _1.._n
+    if os.path.exists(path):
+        return [path]
+    files = []
+    idx = 1
+    while os.path.exists(optimize_data.chunk_path(path, idx)):
+        files.append(optimize_data.chunk_path(path, idx))
+        idx += 1
+    return files
+
+def load_cie_profile():
+    # {level: {subject: [[y, s, t, c, filename], ...]}} from the deployed shards
+    profile = {}
+    for level, path in optimize_data.OUTPUTS.items():
+        if level == 'IAL':
+            continue
+        grouped = {}
+        for part in level_files(path):
+            with open(part, 'r', encoding='utf-8') as f:
+                grouped.update(json.load(f))
+        profile[level] = cie_filenames.expand_grouped(grouped, level)
+    return profile
+
+def load_ial_profile():
+    # The block opens with a blank line, which pandas skips and csv would take as the header
+    lines = ial_source.iter_csv_lines(ial_source.EMBEDDED_SOURCE)
+    return list(csv.DictReader(line for line in lines if line.strip()))
+
+def clone_subject(subject, copy):
+    # "Accounting (0452)" -> ("Accounting Copy 2 (2452)", "0452", "2452")
+    match = re.match(r'^(.*) \((\d{4})\)$', subject or '')
+    if not match or copy == 0:
+        return subject, None, None
+    name, code = match.groups()
+    new_code = f"{(int(code) + 1000 * copy) % 10000:04d}"
+    return f"{name} Copy {copy} ({new_code})", code, new_code
+
+def cie_rows(profile, scale):
+    for copy in range(scale):
+        for level, grouped in profile.items():
+            for subject, records in grouped.items():
+                name, code, new_code = clone_subject(subject, copy)
+                for y, s, t, c, filename in records:
+                    if code and filename:
+                        filename = filename.replace(code, new_code, 1)
+                    year = '' if not y else 2000 + y if y < 50 else 1900 + y
+                    yield {
+                        'Category': f"[{level}]",
+                        'Subject': f"[{name}]",
+                        'Year': year,
+                        'Extracted_Year': year,
+                        'Extracted_Session': SESSION_NAMES.get(s, ''),
+                        'Extracted_Type': TYPE_NAMES.get(t, 'Other'),
+                        'Extracted_Component': cie_filenames.component_text(c) or '',
+                        'Extracted_UnitCode': '',
+                        'Full_URL': f"{CIE_URL_PREFIX}{level}/{name}/{filename}" if filename else '',
+                        'Filename': filename or '',
+                    }
+
+def ial_rows(rows, scale):
+    # Clones keep the subject prefix (WMA, WPH, ...) and move the unit number up
+    for copy in range(scale):
+        for row in rows:
+            match = UNIT_CODE_RE.match(row['Unit_Code'] or '')
+            if copy == 0 or not match:
+                yield row
+                continue
+            code = row['Unit_Code']
+            new_code = f"{match.group(1)}{int(match.group(2)) + 100 * copy}"
+            yield {
+                'Unit_Code': new_code,
+                'Title': row['Title'].replace(code, new_code),
+                'Date': row['Date'],
+                'URL': row['URL'].replace(code.lower(), new_code.lower()),
+            }
+
+def write_csv(path, columns, rows):
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+def generate(output_dir, scale=1):
+    # Returns {'cie': path, 'ial': path, 'cie_rows': n, 'ial_rows': n}
+    os.makedirs(output_dir, exist_ok=True)
+    cie_path = os.path.join(output_dir, 'cie.csv')
+    ial_path = os.path.join(output_dir, 'ial.csv')
+    cie_count = write_csv(cie_path, CIE_COLUMNS, cie_rows(load_cie_profile(), scale))
+    ial_count = write_csv(ial_path, IAL_COLUMNS, ial_rows(load_ial_profile(), scale))
+    return {'cie': cie_path, 'ial': ial_path, 'cie_rows': cie_count, 'ial_rows': ial_count}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic CIE/IAL archive at a multiple of today's size")
+    parser.add_argument('output_dir')
+    parser.add_argument('--scale', type=int, default=1, help="Size multiple (default: 1)")
+    args = parser.parse_args()
+
+    result = generate(args.output_dir, args.scale)
+    print(f"Wrote {result['cie_rows']:,} CIE rows to {result['cie']} and {result['ial_rows']:,} IAL rows to {result['ial']}")
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+# The modules under test live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The CIE source as the loaders read it: developmentfiles/cie.csv when it is
+# checked out, otherwise the scale-1 synthetic archive, which reproduces the
+# deployed CIE records
+@pytest.fixture(scope='session')
+def cie_csv(tmp_path_factory):
+    pd = pytest.importorskip('pandas')
+    import build
+    import synthetic_archive
+
+    source = os.path.join(ROOT, build.CIE_SOURCE)
+    if os.path.exists(source):
+        return pd.read_csv(source)
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        archive = synthetic_archive.generate(str(tmp_path_factory.mktemp('archive')), 1)
+    finally:
+        os.chdir(cwd)
+    return pd.read_csv(archive['cie'])
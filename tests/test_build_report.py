@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+# The modules under test live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import build_report
+
+pytestmark = pytest.mark.skipif(build_report.status_kb() is None or not build_report.reset_peak(),
+                                reason="per-stage peak RSS needs Linux /proc")
+
+def touch(mb):
+    block = bytearray(mb * 1024 * 1024)
+    for i in range(0, len(block), 4096):
+        block[i] = 1
+    return block
+
+@pytest.fixture(autouse=True)
+def fresh_stages(monkeypatch):
+    monkeypatch.setattr(build_report, 'STAGES', [])
+
+def test_stage_peaks_are_per_stage():
+    with build_report.stage('outer'):
+        with build_report.stage('big'):
+            block = touch(150)
+            del block
+        with build_report.stage('small'):
+            block = touch(10)
+            del block
+    outer, big, small = build_report.STAGES
+    # The small stage runs after the big one and must not inherit its peak
+    assert big['rss_delta_mb'] >= 140
+    assert small['rss_delta_mb'] < 50
+    assert small['peak_rss_mb'] < big['peak_rss_mb']
+    # The enclosing stage covers its nested stages
+    assert outer['peak_rss_mb'] >= big['peak_rss_mb']
+    assert build_report.peak_rss_mb() >= big['peak_rss_mb']
@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+
+import pytest
+
+# The modules under test live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import deltas
+
+GROUPED = {
+    'Physics (0625)': [
+        [19, 6, 'qp', '12', '0625_s19_qp_12.pdf'],
+        [19, 6, 'other', '12', '0625_s19_ms_12.pdf'],
+    ],
+}
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(deltas, 'RELEASES_DIR', str(tmp_path / 'releases'))
+    monkeypatch.setattr(deltas, 'DELTAS_DIR', str(tmp_path / 'deltas'))
+    return tmp_path
+
+def read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def test_changed_record_with_same_filename_is_patched(dirs):
+    deltas.save_deltas(GROUPED, 'public/igcse.json', 'IGCSE')
+    first = read_json(dirs / 'deltas' / 'igcse' / 'index.json')['version']
+
+    changed = {'Physics (0625)': [GROUPED['Physics (0625)'][0], [19, 6, 'ms', '12', '0625_s19_ms_12.pdf']]}
+    deltas.save_deltas(changed, 'public/igcse.json', 'IGCSE')
+    index = read_json(dirs / 'deltas' / 'igcse' / 'index.json')
+    assert index['version'] != first
+    assert index['from'] == [first]
+
+    delta = read_json(dirs / 'deltas' / 'igcse' / f'{first}.json')
+    assert len(delta['removed']) == 1
+    assert sum(len(records) for records in delta['added'].values()) == 1
+    patched = deltas.apply_delta(GROUPED, delta, 'IGCSE')
+    assert sorted(patched['Physics (0625)']) == sorted(changed['Physics (0625)'])
+
+def test_standalone_and_build_outputs_share_a_history(dirs):
+    deltas.save_deltas(GROUPED, 'public/cie_IGCSE.json', 'IGCSE')
+    deltas.save_deltas(GROUPED, 'public/igcse.json', 'IGCSE')
+    assert os.listdir(dirs / 'deltas') == ['igcse']
+    assert os.listdir(dirs / 'releases') == ['igcse']
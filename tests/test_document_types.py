@@ -0,0 +1,60 @@
+import os
+import sys
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+# The modules under test live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import cie_filenames
+
+# The vectorized document_type_series and component_series must equal their
+# row-wise forms on the CIE archive (the cie_csv fixture in conftest.py).
+
+def row_wise(df):
+    return [cie_filenames.document_type(t, f) for t, f in zip(df['Extracted_Type'], df['Filename'])]
+
+def test_series_matches_row_wise(cie_csv):
+    labels = cie_filenames.document_type_series(cie_csv['Extracted_Type'], cie_csv['Filename'])
+    assert list(labels) == row_wise(cie_csv)
+
+@pytest.mark.parametrize('extracted_type, filename, label', [
+    ('Grade Thresholds', '0625_s14_gt.pdf', 'Grade Thresholds'),
+    ('Other', '0625_s14_gt.pdf', 'Grade Thresholds'),
+    ('Mark Scheme', '9700_s04_ms.pdf', 'Mark Scheme'),
+    # Irregular names fall back to the code standing alone in the name
+    ('Question Paper', '9696_s03_qp_2+3.pdf', 'Question Paper'),
+    ('Other', '9691_s09_ms_1v2.pdf', 'Mark Scheme'),
+    # "er" inside "Other" / "Paper" is not an examiner report
+    ('Other', '0625_w20_ci_52.pdf', 'Instructions'),
+    ('Other', '0500_m17_in_32.pdf', 'Other'),
+    ('Other', '0452_Example_Candidate_Responses_Paper_2.pdf', 'Other'),
+    ('Examiner Report', '9709_s19_er.pdf', 'Examiner Report'),
+    (float('nan'), float('nan'), 'Other'),
+])
+def test_document_type(extracted_type, filename, label):
+    assert cie_filenames.document_type(extracted_type, filename) == label
+    series = cie_filenames.document_type_series(pd.Series([extracted_type]), pd.Series([filename]))
+    assert list(series) == [label]
+
+def test_component_series_matches_row_wise(cie_csv):
+    comps = cie_filenames.component_series(cie_csv['Extracted_Component'], cie_csv['Filename'])
+    assert list(comps) == [cie_filenames.component(c, f) for c, f in zip(cie_csv['Extracted_Component'], cie_csv['Filename'])]
+
+@pytest.mark.parametrize('extracted_component, filename, comp', [
+    (32, '9709_s19_qp_32.pdf', 32),
+    ('12', '9709_s19_qp_32.pdf', 12),
+    # No Extracted_Component: the filename's paper and variant
+    (float('nan'), '0452_y10_sp_1.pdf', 1),
+    ('', '9709_s19_ms_30.pdf', 30),
+    (float('nan'), '9709_s19_gt.pdf', 0),
+    (float('nan'), '0470_s16_in_A_21.pdf', 0),
+    (float('nan'), float('nan'), 0),
+])
+def test_component(extracted_component, filename, comp):
+    assert cie_filenames.component(extracted_component, filename) == comp
+    series = cie_filenames.component_series(pd.Series([extracted_component]), pd.Series([filename]))
+    assert list(series) == [comp]
@@ -0,0 +1,141 @@
+import os
+import sys
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+# The modules under test live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import benchmark
+import cie_filenames
+import frame_search
+import paper_query
+
+# mani-cie.py's vectorized process_data against the row-wise loader it
+# replaced. The labelling rules changed in user-020 (cie_filenames.component
+# and document_type), so the original is run both as it was and with those
+# two rules swapped in: with the same rules the outputs must be identical, and
+# as it was they may differ only in the columns the rules feed.
+
+RULE_COLUMNS = ['Comp_Raw', 'Paper_Display', 'Paper_Search_Name', 'Type_Category', 'Search_Context']
+
+def original_process_data(df, component=None, categorize=None):
+    # load_and_process_data as of the baseline, after its read_csv
+    df['Year_Val'] = pd.to_numeric(df['Year'], errors='coerce')
+    df = df.dropna(subset=['Year_Val'])
+    df['Year_Val'] = df['Year_Val'].astype(int)
+
+    df['Level'] = df['Category'].str.strip("[]").fillna("CIE")
+    sub_extract = df['Subject'].str.extract(r'\[(.*?) \((\d+)\)\]')
+    df['Subject_Name'] = sub_extract[0].fillna("General")
+    df['Subject_Code'] = sub_extract[1].fillna("")
+
+    session_map = {'Feb/March': 'March', 'May/June': 'June', 'Oct/Nov': 'November'}
+    df['Session'] = df['Extracted_Session'].map(session_map).fillna('Other')
+
+    if component is None:
+        df['Comp_Raw'] = pd.to_numeric(df['Extracted_Component'], errors='coerce').fillna(0).astype(int)
+    else:
+        df['Comp_Raw'] = df.apply(lambda row: component(row['Extracted_Component'], row['Filename']), axis=1)
+
+    def parse_component(val):
+        if val == 0: return "-", ""
+        s = str(val)
+        if len(s) == 2: return s, f"Paper {s[0]} Variant {s[1]}"
+        return s, f"Paper {s}"
+
+    comp_data = df['Comp_Raw'].apply(parse_component)
+    df['Paper_Display'] = comp_data.apply(lambda x: x[0])
+    df['Paper_Search_Name'] = comp_data.apply(lambda x: x[1])
+
+    def categorize_type(t, filename):
+        t, f = str(t).lower(), str(filename).lower()
+        if 'qp' in t or '_qp_' in f: return 'Question Paper'
+        if 'ms' in t or '_ms_' in f: return 'Mark Scheme'
+        if 'er' in t or '_er_' in f: return 'Examiner Report'
+        if 'gt' in t or '_gt_' in f: return 'Grade Thresholds'
+        if 'sp' in t or '_sp_' in f: return 'Specimen Paper'
+        if 'sy' in t or '_sy_' in f: return 'Syllabus'
+        if 'ir' in t or 'ci' in t or '_ir_' in f: return 'Instructions'
+        return 'Other'
+
+    categorize = categorize or categorize_type
+    df['Type_Category'] = df.apply(lambda row: categorize(row['Extracted_Type'], row['Filename']), axis=1)
+
+    df['Search_Context'] = (
+        df['Level'].astype(str) + " " + df['Subject_Name'].astype(str) + " " +
+        df['Subject_Code'].astype(str) + " " + df['Year_Val'].astype(str) + " " +
+        df['Session'].astype(str) + " " + df['Type_Category'].astype(str) + " " +
+        df['Paper_Display'].astype(str) + " " + df['Paper_Search_Name']
+    ).str.lower()
+
+    df.sort_values(by=['Year_Val', 'Subject_Name'], ascending=[False, True], inplace=True)
+    return df
+
+def sample_csv():
+    # Rows with and without an Extracted_Component, names in and outside the
+    # filename grammar, and the "Other" types the substring rules mislabelled
+    rows = [
+        ('9709_s19_qp_32.pdf', 'Question Paper', 32, 'May/June', 2019),
+        ('9709_s19_ms_32.pdf', 'Mark Scheme', None, 'May/June', 2019),
+        ('9709_s19_ms_30.pdf', 'Other', None, 'May/June', 2019),
+        ('9709_s19_gt.pdf', 'Grade Thresholds', None, 'May/June', 2019),
+        ('9709_s19_er.pdf', 'Other', None, 'May/June', 2019),
+        ('0452_y10_sp_1.pdf', 'Other', None, None, 2010),
+        ('0452_y10_sm_2.pdf', 'Other', None, None, 2010),
+        ('0625_w20_ci_52.pdf', 'Other', 52, 'Oct/Nov', 2020),
+        ('0625_s14_gt.pdf', 'Other', None, 'May/June', 2014),
+        ('9700_s04_ms.pdf', 'Mark Scheme', None, 'May/June', 2004),
+        ('9696_s03_qp_2+3.pdf', 'Question Paper', None, 'May/June', 2003),
+        ('9691_s09_ms_1v2.pdf', 'Other', None, 'May/June', 2009),
+        ('0470_s16_in_A_21.pdf', 'Other', None, 'May/June', 2016),
+        ('0452_m15_er.pdf', 'Examiner Report', None, 'Feb/March', 2015),
+        ('0452_Example_Candidate_Responses_Paper_2.pdf', 'Other', None, None, None),
+        ('1522_j21_qp_12.pdf', 'Question Paper', 12, None, 2021),
+    ]
+    return pd.DataFrame({
+        'Category': ['[AS and A Level]'] * len(rows),
+        'Subject': ['[Mathematics (%s)]' % name[:4] for name, *_ in rows],
+        'Year': [year for *_, year in rows],
+        'Extracted_Session': [session for *_, session, _ in rows],
+        'Extracted_Type': [t for _, t, *_ in rows],
+        'Extracted_Component': [c for _, _, c, *_ in rows],
+        'Filename': [name for name, *_ in rows],
+    })
+
+@pytest.fixture(params=['sample', 'archive'])
+def source(request):
+    if request.param == 'sample':
+        return sample_csv()
+    return request.getfixturevalue('cie_csv')
+
+@pytest.fixture(scope='module')
+def process_data():
+    return benchmark.load_streamlit_function(
+        os.path.join(ROOT, 'developmentfiles', 'mani-cie.py'), name='process_data')
+
+def test_matches_original_with_the_same_rules(source, process_data):
+    expected = original_process_data(
+        source.copy(), component=cie_filenames.component, categorize=cie_filenames.document_type)
+    pd.testing.assert_frame_equal(process_data(source.copy()), expected, check_dtype=False)
+
+def test_differs_from_original_only_in_the_rule_columns(source, process_data):
+    expected = original_process_data(source.copy())
+    df = process_data(source.copy())
+    pd.testing.assert_frame_equal(df.drop(columns=RULE_COLUMNS), expected.drop(columns=RULE_COLUMNS))
+    # The filename fallback only fills rows without an Extracted_Component
+    has_component = expected['Comp_Raw'] != 0
+    assert (df['Comp_Raw'][has_component] == expected['Comp_Raw'][has_component]).all()
+
+def test_sittings_without_a_session_come_from_the_filename(process_data):
+    build_search_index = benchmark.load_streamlit_function(
+        os.path.join(ROOT, 'developmentfiles', 'mani-cie.py'), name='build_search_index')
+    df = process_data(sample_csv())
+    index = build_search_index(df)
+    for query, filename in [('j21', '1522_j21_qp_12.pdf'), ('w20 ci', '0625_w20_ci_52.pdf')]:
+        filters, terms = paper_query.parse_query(query, index['columns']['code'], index['columns']['year'])
+        rows = frame_search.search(index, terms, filters)
+        assert list(df['Filename'].iloc[rows]) == [filename]
@@ -0,0 +1,26 @@
+import os
+import sys
+
+# The modules under test live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import optimize_data
+
+def test_pack_chunks_fits_the_budget():
+    chunks = optimize_data.pack_chunks({f's{i:02d}': 30 for i in range(10)}, 100)
+    assert len(chunks) == 4
+    assert sorted(s for chunk in chunks for s in chunk) == [f's{i:02d}' for i in range(10)]
+
+def test_pack_chunks_never_exceeds_what_the_client_fetches():
+    sizes = {f's{i:02d}': 30 for i in range(40)}
+    chunks = optimize_data.pack_chunks(sizes, 100)
+    assert len(chunks) == optimize_data.MAX_CHUNKS
+    assert sorted(s for chunk in chunks for s in chunk) == sorted(sizes)
+
+def test_remove_stale_chunks(tmp_path):
+    path = str(tmp_path / 'igcse.json')
+    for idx in range(1, 8):
+        open(optimize_data.chunk_path(path, idx), 'w').close()
+    optimize_data.remove_stale_chunks(path, 3)
+    assert sorted(os.listdir(tmp_path)) == ['igcse_1.json', 'igcse_2.json', 'igcse_3.json']
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+# The modules under test live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import paper_query
+
+CODES = {'9709', '0625', '2010'}
+YEARS = set(range(2005, 2026))
+
+@pytest.mark.parametrize('query, filters, terms', [
+    ('9709 s19 qp 32', {'code': {'9709'}, 'sitting': {201906}, 'type': {'qp'}, 'component': {32}}, []),
+    ('9709_s19_qp_32.pdf', {'code': {'9709'}, 'sitting': {201906}, 'type': {'qp'}, 'component': {32}}, []),
+    ('j21', {'sitting': {202101}}, []),
+    ('paper 3 variant 2', {'paper': {3}, 'variant': {2}}, []),
+    ('p3v2', {'component': {32}}, []),
+    ('p3 v2', {'paper': {3}, 'variant': {2}}, []),
+    ('3', {'paper': {3}}, []),
+    ('2019', {'year': {2019}}, []),
+    ('2010', {}, ['2010']),
+    ('2015-2019', {'year': set(range(2015, 2020))}, []),
+    ('15-19', {'year': set(range(2015, 2020))}, []),
+    ('2017 to 15', {'year': set(range(2015, 2018))}, []),
+    # 2032 and 2033 are not years in the data: two components, not a range
+    ('32 - 33', {'component': {32, 33}}, ['-']),
+    # 15 could be 2015 or paper 1 variant 5, so it is matched as text
+    ('15', {}, ['15']),
+    ('0625 15 ms', {'code': {'0625'}, 'type': {'ms'}}, ['15']),
+    ('32', {'component': {32}}, []),
+    ('physics', {}, ['physics']),
+])
+def test_parse_query(query, filters, terms):
+    assert paper_query.parse_query(query, CODES, YEARS) == (filters, terms)
+
+def test_short_numbers_without_years():
+    # With no years to check against, 2-digit numbers are components
+    assert paper_query.parse_query('15-19') == ({}, ['15-19'])
+    assert paper_query.parse_query('15') == ({'component': {15}}, [])
@@ -0,0 +1,39 @@
+import os
+import sys
+
+# The modules under test live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import search_index
+
+GROUPED = {
+    'Physics (0625)': [[19, 6, 'qp', 12], [19, 11, 'ms', 21]],
+    'Physics (9-1) (0972)': [[19, 6, 'qp', 12]],
+    'Accounting (0452)': [[21, 3, 'ms', 22]],
+}
+
+def parts_of(record_id):
+    # The fields the client's scan reads: subject, year, session and component
+    subject, (y, s, t, c) = [(subject, record) for subject, records in GROUPED.items() for record in records][record_id]
+    return [subject, 2000 + y, search_index.SESSION_NAMES.get(s), c]
+
+def search(query):
+    return search_index.search(search_index.build_index(GROUPED, 'IGCSE'), query, parts_of)
+
+def test_words_match_inside_tokens():
+    assert search('phys 19') == [0, 1, 2]
+    assert search('s19') == [0, 2]
+    assert search('0452 p2') == [3]
+
+def test_terms_with_punctuation_match_whole():
+    # "9-1" is not just "9" and "1": it must appear in a field
+    assert search('9-1') == [2]
+    assert search('physics (9-1)') == [2]
+    assert search('feb/march') == [3]
+    assert search('may/june 0625') == [0]
+
+def test_punctuation_only_terms():
+    assert search('-') == [2]
+    assert search('/') == [0, 1, 2, 3]
+    assert search('   ') is None